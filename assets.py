@@ -0,0 +1,127 @@
+"""
+Front-end scripts served from this process instead of public CDNs.
+
+Each asset gets a content-hashed URL so it can be cached forever
+(immutable), and a gzip variant compressed once and kept on disk in
+static/build/. Plotly comes from the installed plotly package, so the JS
+always matches the figures the Python side generates. htmx is pinned to
+HTMX_VERSION and committed as static/htmx.min.js; after bumping the
+version, run `python assets.py` (online) to fetch the new copy. A missing
+asset is logged as an error and loaded from its CDN instead.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).parent / "static"
+BUILD_DIR  = STATIC_DIR / "build"
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+log = logging.getLogger(__name__)
+
+HTMX_VERSION = "1.9.12"
+HTMX_URL     = f"https://unpkg.com/htmx.org@{HTMX_VERSION}/dist/htmx.min.js"
+
+
+def plotlyPath() -> Path:
+    import plotly
+    return Path(plotly.__file__).parent / "package_data" / "plotly.min.js"
+
+
+def plotlyUrl() -> str:
+    """CDN copy of the plotly.js bundled with the installed plotly package."""
+    from plotly.offline import get_plotlyjs_version
+    return f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+
+# asset name -> (where it lives locally, CDN fallback, version it must contain)
+SOURCES = {
+    "plotly.min.js": (plotlyPath, plotlyUrl, None),
+    "htmx.min.js":   (lambda: STATIC_DIR / "htmx.min.js", lambda: HTMX_URL, HTMX_VERSION),
+}
+
+MEDIA_TYPES = {".js": "application/javascript", ".css": "text/css"}
+
+
+@dataclass(frozen=True)
+class Asset:
+    body:       bytes
+    gz:         bytes
+    etag:       str
+    media_type: str
+
+
+ASSETS: dict[str, Asset] = {}   # hashed file name -> asset
+URLS:   dict[str, str]   = {}   # asset name -> URL the page should load
+_lock = threading.Lock()
+
+
+def hashedName(name: str, digest: str) -> str:
+    stem, _, ext = name.partition(".")
+    return f"{stem}-{digest}.{ext}"
+
+
+def compressed(hashed: str, body: bytes) -> bytes:
+    """gzip variant, compressed once per content hash and kept on disk."""
+    path = BUILD_DIR / f"{hashed}.gz"
+    if path.exists():
+        return path.read_bytes()
+
+    gz = gzip.compress(body, compresslevel=9, mtime=0)
+    try:
+        BUILD_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(gz)
+    except OSError:
+        pass  # read-only checkout: keep it in memory only
+    return gz
+
+
+def loadAssets():
+    with _lock:
+        if URLS:
+            return
+
+        for name, (locate, cdn_url, version) in SOURCES.items():
+            path = locate()
+            if not path.exists():
+                URLS[name] = cdn_url()
+                log.error("%s is missing; pages load it from %s", path, URLS[name])
+                continue
+
+            body   = path.read_bytes()
+            if version and version.encode() not in body:
+                log.error("%s is not version %s; run `python assets.py`", path, version)
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            hashed = hashedName(name, digest)
+
+            ASSETS[hashed] = Asset(
+                body=body,
+                gz=compressed(hashed, body),
+                etag=f'"{digest}"',
+                media_type=MEDIA_TYPES.get(path.suffix, "application/octet-stream"),
+            )
+            URLS[name] = f"/static/{hashed}"
+
+
+def assetUrl(name: str) -> str:
+    loadAssets()
+    return URLS[name]
+
+
+def getAsset(hashed: str) -> Asset | None:
+    loadAssets()
+    return ASSETS.get(hashed)
+
+
+if __name__ == "__main__":
+    # one-time setup on a machine with internet access
+    STATIC_DIR.mkdir(exist_ok=True)
+    target = STATIC_DIR / "htmx.min.js"
+    with urllib.request.urlopen(HTMX_URL) as resp:
+        target.write_bytes(resp.read())
+    print(f"saved htmx {HTMX_VERSION} -> {target}")
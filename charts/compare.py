@@ -0,0 +1,208 @@
+"""
+Side-by-side comparison of players (in one game or the season) or games
+(for one player or the team).
+
+Everything a comparison draws is additive per (player, game): the
+leaderboard's stat counts, throw outcome and throw type counts, and passes
+per forward-distance bin. Those are built for the whole session with a few
+groupbys (getAggregates, run at ingest), and each compared entity is the
+sum of its rows, so no comparison goes back to the pass rows.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from . import distribution
+from .constants import *
+from .figure      import addTrace, subplots, updateAxes
+from .leaderboard import LEADER_COLS, SUM_COLS, boardFromCounts
+from .passes      import PASS_LEGEND, TEAM_MASKS, passColors
+
+KEYS = ["Player", "Game"]
+OUTCOMES = {"non_scoring": "Completions", "assist": "Assists", "turnover": "Turnovers"}
+ENTITY_COLORS = [BLUE, RED, GREEN, PURPLE, LIGHTBLUE, GRAY]
+
+@dataclass
+class Aggregates:
+    """Per (player, game) rows; passes count for their thrower."""
+    counts:   pd.DataFrame   # SUM_COLS + "blocks"
+    outcomes: pd.DataFrame   # PASS_LEGEND names
+    types:    pd.DataFrame   # TEAM_MASKS names
+    distance: pd.DataFrame   # (OUTCOMES key, bin start) -> passes
+
+    def merged(self, keys):
+        """Totals over the given (player, game) keys; keys with no rows count as zero."""
+        index = pd.MultiIndex.from_tuples(keys, names=KEYS)
+        return {
+            name: frame.reindex(index, fill_value=0).sum()
+            for name, frame in vars(self).items()
+        }
+
+def getAggregates(data) -> Aggregates:
+    return data.cached(("aggregates",), lambda: buildAggregates(data))
+
+def buildAggregates(data) -> Aggregates:
+    empty = pd.MultiIndex.from_tuples([], names=KEYS)
+
+    stats = data.get("Player Stats", pd.DataFrame())
+    if stats.empty:
+        counts = pd.DataFrame(0, index=empty, columns=[*SUM_COLS, "blocks"])
+    else:
+        counts = stats.groupby(KEYS)[SUM_COLS].sum()
+        blocks = data.get("Defensive Blocks", pd.DataFrame())
+        b = blocks.groupby(KEYS).size() if not blocks.empty else pd.Series(0, index=counts.index)
+        counts["blocks"] = b.reindex(counts.index, fill_value=0).astype(int)
+
+    passes = data.get("Passes", pd.DataFrame())
+    if passes.empty:
+        return Aggregates(
+            counts,
+            pd.DataFrame(0, index=empty, columns=list(PASS_LEGEND)),
+            pd.DataFrame(0, index=empty, columns=list(TEAM_MASKS)),
+            pd.DataFrame(0, index=empty, columns=pd.MultiIndex.from_tuples([], names=["outcome", "bin"])),
+        )
+
+    by = [passes["Thrower"].rename("Player"), passes["Game"]]
+
+    names = {c: n for n, c in PASS_LEGEND.items()}
+    outcome = pd.Series(passColors(passes, True), index=passes.index).map(names)
+    outcomes = (
+        pd.crosstab(by, outcome)
+        .reindex(columns=list(PASS_LEGEND), fill_value=0)
+    )
+
+    h = passes['Huck?'] == 1
+    s = passes['From sideline?'] == 1
+    r = passes[STARTY] <= 0.35
+    types = pd.DataFrame({name: fn(h, s, r) for name, fn in TEAM_MASKS.items()}).groupby(by).sum()
+
+    # same bins and outcome split as genDistribution
+    dist = passes["Forward distance (m)"]
+    in_range = (dist >= distribution.X_MIN) & (dist < distribution.X_MAX)
+    start = (np.floor((dist - distribution.X_MIN) / distribution.BIN_SIZE)
+             * distribution.BIN_SIZE + distribution.X_MIN)
+    kind = pd.Series(np.select(
+        [passes["Turnover?"] == 1, passes["Assist?"] == 1],
+        ["turnover", "assist"], "non_scoring",
+    ), index=passes.index)
+    distance = pd.crosstab(
+        [by[0][in_range], by[1][in_range]],
+        [kind[in_range].rename("outcome"), start[in_range].astype(int).rename("bin")],
+    )
+
+    return Aggregates(counts, outcomes, types, distance)
+
+def entities(data, by, picks, game="All", player="Team"):
+    """
+    label -> (player, game) keys for each picked player (in game, or every
+    game for "All") or each picked game (for player, or the team).
+    """
+    agg = getAggregates(data)
+    index = agg.counts.index.union(agg.outcomes.index)
+
+    def keys(p, g):
+        return [
+            k for k in index
+            if (p == "Team" or k[0] == p) and (g == "All" or k[1] == g)
+        ]
+
+    if by == "players":
+        return {p: keys(p, game) for p in picks}
+    return {("Season" if g == "All" else f"vs. {g}"): keys(player, g) for g in picks}
+
+def compareFigures(data, groups: dict, title):
+    """Stats table, throw categories and distance distribution for each entity."""
+    agg = getAggregates(data)
+    merged = {label: agg.merged(keys) for label, keys in groups.items()}
+    colors = {label: ENTITY_COLORS[i % len(ENTITY_COLORS)] for i, label in enumerate(groups)}
+    return [
+        compareTable(merged, title),
+        compareThrows(merged, colors),
+        compareDistance(merged, colors),
+    ]
+
+def compareTable(merged, title):
+    counts = pd.DataFrame({label: m["counts"] for label, m in merged.items()}).T
+    board = boardFromCounts(title, counts)
+
+    cols = [c for c in LEADER_COLS if c != "player"]
+    def fmt(col, v):
+        if col == "plus_minus":
+            return f"{'+' if v >= 0 else ''}{v:g}"
+        return f"{v}%" if col.endswith("_pct") or col == "involvement" else str(v)
+
+    ROW_H, PAD = 28, 40
+    fig = go.Figure(go.Table(
+        columnwidth=[2] + [1] * len(board),
+        header=dict(
+            values=["<b>STAT</b>"] + [f"<b>{p}</b>" for p in board["player"]],
+            fill_color=WHITE, align=["left"] + ["right"] * len(board),
+            line=dict(width=0),
+        ),
+        cells=dict(
+            values=[[f"<em>{LEADER_COLS[c]}</em>" for c in cols]] + [
+                [fmt(c, row[c]) for c in cols] for row in board.to_dict("records")
+            ],
+            fill_color=WHITE, align=["left"] + ["right"] * len(board),
+            line=dict(width=0),
+        ),
+    ))
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), height=(len(cols) + 1) * ROW_H + PAD)
+    return fig
+
+def compareThrows(merged, colors):
+    fig = subplots(rows=1, cols=2, titles=("Throw Outcomes", "Throw Types"), horizontal_spacing=0.08)
+    fig["layout"].update(
+        barmode="group", height=450,
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        margin=dict(l=60, r=20, t=60, b=40),
+        legend=dict(orientation="h", x=0.01, y=-0.12),
+    )
+    for label, m in merged.items():
+        for cell, series in ((1, m["outcomes"]), (2, m["types"])):
+            addTrace(fig, dict(
+                type="bar", x=list(series.index), y=series.to_numpy(),
+                name=label, legendgroup=label, showlegend=(cell == 1),
+                marker=dict(color=colors[label]),
+                hovertemplate=f"{label}: %{{y}}<extra></extra>",
+            ), cell)
+    for cell in (1, 2):
+        updateAxes(fig, cell, y=dict(title=dict(text="Num. Passes"), showgrid=True, gridcolor=LIGHTGRAY))
+    return fig
+
+def compareDistance(merged, colors):
+    """Share of each entity's throws per bin, and completion % per bin."""
+    fig = subplots(
+        rows=2, cols=1,
+        titles=("Throws by Forward Distance (% of throws)", "Completion % by Forward Distance"),
+        vertical_spacing=0.12,
+    )
+    fig["layout"].update(
+        height=700, plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        margin=dict(l=60, r=20, t=60, b=40),
+        legend=dict(orientation="h", x=0.01, y=-0.08),
+    )
+
+    starts = np.arange(distribution.X_MIN, distribution.X_MAX, distribution.BIN_SIZE)
+    centers = starts + distribution.BIN_SIZE / 2
+    for label, m in merged.items():
+        d = m["distance"]
+        per = {o: np.array([d.get((o, b), 0) for b in starts], dtype=float) for o in OUTCOMES}
+        total = sum(per.values())
+        share = total / total.sum() * 100 if total.sum() else total
+        with np.errstate(invalid="ignore", divide="ignore"):
+            completion = np.where(total > 0, (per["non_scoring"] + per["assist"]) / total * 100, np.nan)
+
+        style = dict(mode="lines+markers", line=dict(color=colors[label], width=2), legendgroup=label)
+        addTrace(fig, dict(type="scatter", x=centers, y=share.round(1), name=label, **style), 1)
+        addTrace(fig, dict(type="scatter", x=centers, y=np.round(completion, 1), name=label,
+                           showlegend=False, **style), 2)
+
+    for cell in (1, 2):
+        updateAxes(fig, cell,
+                   x=dict(range=[distribution.X_MIN, distribution.X_MAX]),
+                   y=dict(showgrid=True, gridcolor=LIGHTGRAY))
+    updateAxes(fig, 2, x=dict(title=dict(text="Forward Distance (m)")), y=dict(range=[0, 105]))
+    return fig
@@ -0,0 +1,92 @@
+import numpy as np
+from .constants import *
+from .figure    import addFieldStyle, addTrace, setTitle, subplots
+from processor  import selectRows
+
+LOCX = 'Location X (0 -> 1 = left sideline -> right sideline)'
+LOCY = 'Location Y (0 -> 1 = back of opponent endzone -> back of own endzone)'
+
+BLOCK_LEGEND = {
+    "Callahan": GREEN,
+    "Stall":    PURPLE,
+    "Endzone":  BLUE,
+    "Block":    LIGHTBLUE,
+}
+
+STALL_LEGEND = {
+    "Stalled":  RED,
+}
+
+def flag(df, col):
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[col].fillna(0).astype(bool).to_numpy()
+
+def blockCategories(blocks):
+    """Vectorized category per block; first matching flag wins."""
+    endzone = flag(blocks, "In own endzone?") | flag(blocks, "In opponent's endzone?")
+    return np.select(
+        [flag(blocks, "Callahan?"), flag(blocks, "Stall out?"), endzone],
+        ["Callahan", "Stall", "Endzone"],
+        default="Block",
+    )
+
+def locations(df):
+    x = X_MIN + df[LOCX].to_numpy() * (X_MAX - X_MIN)
+    y = Y_MAX + df[LOCY].to_numpy() * (Y_MIN - Y_MAX)
+    return x, y
+
+def addMarkers(fig, df, categories, legend, legend_ref, col):
+    """One marker trace per category. Returns the total drawn."""
+    if df.empty or LOCX not in df.columns:
+        x = y = np.empty(0)
+        categories = np.empty(0, dtype=object)
+    else:
+        x, y = locations(df)
+
+    for name, c in legend.items():
+        m = categories == name
+        addTrace(fig, dict(
+            type="scatter", x=x[m], y=y[m], mode="markers",
+            marker=dict(size=12, color=c, line=dict(width=1, color=BACKGROUND)),
+            name=f"{name} ({int(m.sum())})",
+            legend=legend_ref, showlegend=True,
+            hovertemplate=f"{name}<extra></extra>",
+        ), col)
+
+    return len(categories)
+
+def genDefenseMaps(blocks, stalls, header=""):
+    fig = subplots(
+        rows=1, cols=2,
+        titles=["Blocks", "Stall Outs Against"],
+        horizontal_spacing=0.35,
+    )
+    fig["layout"].update(
+        title=dict(text=header, x=0.01, y=0.96, font=dict(size=15)),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        height=700,
+        margin=dict(l=20, r=20, t=80, b=20),
+        legend=dict(x=0.35, bgcolor="rgba(0,0,0,0)", borderwidth=0),
+        legend2=dict(bgcolor="rgba(0,0,0,0)", borderwidth=0),
+    )
+
+    categories = blockCategories(blocks) if not blocks.empty else None
+    n_blocks = addMarkers(fig, blocks, categories, BLOCK_LEGEND, "legend", col=1)
+
+    stalled = np.full(len(stalls), "Stalled", dtype=object)
+    n_stalls = addMarkers(fig, stalls, stalled, STALL_LEGEND, "legend2", col=2)
+
+    for col, (name, total) in enumerate(
+        [("Blocks", n_blocks), ("Stall Outs Against", n_stalls)], start=1
+    ):
+        addFieldStyle(fig, col)
+        setTitle(fig, col, f"{name} ({total})")
+
+    return fig
+
+def defenseView(data, game, player, mode):
+    return [genDefenseMaps(
+        selectRows(data, "Defensive Blocks", game),
+        selectRows(data, "Stall Outs Against", game),
+    )]
@@ -0,0 +1,72 @@
+import numpy as np
+from .constants import *
+from .figure    import addTrace
+from .utils     import passCoords
+
+CELL = 5   # metres per grid cell -> 8 x 22 cells on the 40 x 110 field
+
+X_EDGES = np.arange(X_MIN, X_MAX + CELL, CELL)
+Y_EDGES = np.arange(Y_MIN, Y_MAX + CELL, CELL)
+
+COMP_SCALE = [[0, RED], [0.5, LIGHTGRAY], [1, BLUE]]
+
+def binPasses(data, by="start"):
+    """
+    Bin passes onto the field grid by start (or end) position.
+
+    Returns per-cell pass counts, completion rate (%) and mean pass vector,
+    all as (x cells, y cells) arrays from vectorized 2D histograms.
+    """
+    sx, sy, ex, ey = passCoords(data)
+    bx, by_ = (sx, sy) if by == "start" else (ex, ey)
+    completed = (data["Turnover?"] != 1).to_numpy()
+
+    def hist(weights=None):
+        h, _, _ = np.histogram2d(bx, by_, bins=[X_EDGES, Y_EDGES], weights=weights)
+        return h
+
+    count = hist()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        comp_rate = hist(completed.astype(float)) / count * 100
+        dx = hist(ex - sx) / count
+        dy = hist(ey - sy) / count
+
+    return count, comp_rate, dx, dy
+
+def addDensity(fig, data, cell, by="start", showscale=False):
+    """
+    Draw binned passes into one subplot: a completion-rate heatmap with the
+    pass count in each cell, and one trace of mean-vector arrows. Payload
+    depends on the grid, not on the number of passes.
+    """
+    count, comp_rate, dx, dy = binPasses(data, by)
+    cx = (X_EDGES[:-1] + X_EDGES[1:]) / 2
+    cy = (Y_EDGES[:-1] + Y_EDGES[1:]) / 2
+
+    z    = np.where(count > 0, comp_rate, np.nan).T
+    text = np.where(count > 0, count.astype(int).astype(str), "").T
+    addTrace(fig, dict(
+        type="heatmap",
+        x=cx, y=cy, z=z, text=text, texttemplate="%{text}",
+        customdata=count.T,
+        hovertemplate="%{customdata} passes<br>%{z:.0f}% complete<extra></extra>",
+        colorscale=COMP_SCALE, zmin=0, zmax=100, opacity=0.85,
+        showscale=showscale, colorbar=dict(title=dict(text="Comp %"), len=0.5),
+    ), cell)
+
+    # mean vectors, scaled to half their length so they stay readable,
+    # drawn as one trace with None breaks
+    gx, gy = np.meshgrid(cx, cy, indexing="ij")
+    m = count > 0
+    n = int(m.sum())
+    xs = np.empty(n * 3, dtype=object)
+    ys = np.empty(n * 3, dtype=object)
+    xs[0::3], xs[1::3], xs[2::3] = gx[m], gx[m] + dx[m] * 0.5, None
+    ys[0::3], ys[1::3], ys[2::3] = gy[m], gy[m] + dy[m] * 0.5, None
+    addTrace(fig, dict(
+        type="scatter", x=xs, y=ys, mode="lines",
+        line=dict(width=1.5, color=BACKGROUND),
+        showlegend=False, hoverinfo="skip",
+    ), cell)
+
+    return int(count.sum())
@@ -1,11 +1,49 @@
+from functools import lru_cache
+
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from .constants import *
+from .figure    import addTrace, layoutTemplate, subplots, templated, updateAxes
+from .utils     import passesFiltered
+from processor  import selectRows
 
 BIN_SIZE = 5
 X_MIN, X_MAX = -20, 80
 
+@lru_cache(maxsize=None)
+def distributionLayout():
+    """Four histograms and the per-distance likelihood lines, 1400px tall."""
+    fig = subplots(
+        rows=5, cols=1,
+        titles=["All Throws", "Non-scoring Completions", "Assists", "Turnovers"],
+        vertical_spacing=0.05,
+    )
+
+    fig["layout"].update(
+        title=dict(text="", font=dict(size=16)),
+        showlegend=True, 
+        legend=dict(orientation="h", x=0.30, y=0.18, borderwidth=0),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE, height=1400, width=1000,
+        barmode="stack", bargap=0.1, margin=dict(l=60, r=60, t=60, b=40),
+    )
+
+    for row in range(1, 6):
+        updateAxes(fig, row, x=dict(range=[X_MIN, X_MAX]))
+    updateAxes(fig, 5, x=dict(title=dict(text="Forward Distance (m)")))
+
+    for row in range(1, 5):
+        updateAxes(fig, row, y=dict(
+            title=dict(text="Num. Passes"), showgrid=True, gridcolor=LIGHTGRAY,
+        ))
+
+    updateAxes(fig, 5, y=dict(
+        title=dict(text="Likelihood Per Distance"),
+        showgrid=True, gridcolor=LIGHTGRAY, range=[0, 100],
+    ))
+
+    for ann in fig["layout"]["annotations"]:
+        ann["font"] = dict(size=12)
+    return layoutTemplate(fig)
+
 def genDistribution(passes, title):
     completions = passes[passes["Turnover?"] != 1]
     turnovers   = passes[passes["Turnover?"] == 1]
@@ -38,35 +76,29 @@ def genDistribution(passes, title):
     assist_pct = bin_counts.get("assist", 0) / bin_total * 100
     turn_pct = bin_counts.get("turnover", 0) / bin_total * 100
 
-    subplot_titles = (
-        f"All Throws ({total_throws})",
-        f"Non-scoring Completions ({total_non_scoring})",
-        f"Assists ({total_assists})",
-        f"Turnovers ({total_turnovers})",
-    )
-
-    fig = make_subplots(
-        rows=5, cols=1,
-        subplot_titles=subplot_titles,
-        vertical_spacing=0.05,
+    fig = templated(
+        distributionLayout(),
+        title=title,
+        annotation1=f"All Throws ({total_throws})",
+        annotation2=f"Non-scoring Completions ({total_non_scoring})",
+        annotation3=f"Assists ({total_assists})",
+        annotation4=f"Turnovers ({total_turnovers})",
     )
 
+    xbins = dict(start=X_MIN, end=X_MAX, size=BIN_SIZE)
     stacked_cfg = [
         (df[df["type"] == "non_scoring"]["dist"], BLUE,  "Non-scoring"),
         (df[df["type"] == "assist"]["dist"],      GREEN, "Assist"),
         (df[df["type"] == "turnover"]["dist"],    RED,   "Turnover"),
     ]
     for x_data, color, name in stacked_cfg:
-        fig.add_trace(
-            go.Histogram(
-                x=x_data, name=name,
-                marker=dict(color=color),
-                bingroup=1,
-                xbins=dict(start=X_MIN, end=X_MAX, size=BIN_SIZE),
-                showlegend=False,
-            ),
-            row=1, col=1,
-        )
+        addTrace(fig, dict(
+            type="histogram", x=x_data.to_numpy(), name=name,
+            marker=dict(color=color),
+            bingroup="1",
+            xbins=dict(xbins),
+            showlegend=False,
+        ), 1)
 
     hist_cfg = [
         (df[df["type"] == "non_scoring"]["dist"], BLUE,  2),
@@ -74,13 +106,11 @@ def genDistribution(passes, title):
         (df[df["type"] == "turnover"]["dist"],    RED,   4),
     ]
     for x_data, color, row in hist_cfg:
-        fig.add_trace(
-            go.Histogram(
-                x=x_data, marker=dict(color=color), showlegend=False,
-                xbins=dict(start=X_MIN, end=X_MAX, size=BIN_SIZE),
-            ),
-            row=row, col=1,
-        )
+        addTrace(fig, dict(
+            type="histogram", x=x_data.to_numpy(),
+            marker=dict(color=color), showlegend=False,
+            xbins=dict(xbins),
+        ), row)
 
     line_cfg = [
         (completion_pct, "Non-Scoring Completion %", BLUE, "circle"),
@@ -88,41 +118,23 @@ def genDistribution(passes, title):
         (turn_pct, "Turnover %", RED, "diamond"),
     ]
     for y_data, name, color, symbol in line_cfg:
-        fig.add_trace(go.Scatter(
-                x=bin_centers,
-                y=y_data.fillna(0).values,
-                name=name,
-                mode="lines+markers",
-                marker_symbol=symbol,
-                line=dict(color=color, width=2),
-                marker=dict(size=10),
-            ),
-            row=5, col=1,
-        )
-
-    fig.update_layout(
-        title=dict(text=title, font=dict(size=16)),
-        showlegend=True, 
-        legend=dict(orientation="h", x=0.30, y=0.18, borderwidth=0),
-        plot_bgcolor=WHITE, paper_bgcolor=WHITE, height=1400, width=1000,
-        barmode="stack", bargap=0.1, margin=dict(l=60, r=60, t=60, b=40),
-    )
-
-    fig.update_xaxes(range=[X_MIN, X_MAX])
-    fig.update_xaxes(title_text="Forward Distance (m)", row=5, col=1)
-
-    for row in range(1, 5):
-        fig.update_yaxes(
-            title_text="Num. Passes", row=row, col=1,
-            showgrid=True, gridcolor=LIGHTGRAY,
-        )
-
-    fig.update_yaxes(
-        title_text="Likelihood Per Distance", row=5, col=1,
-        showgrid=True, gridcolor=LIGHTGRAY, range=[0, 100],
-    )
-
-    for ann in fig.layout.annotations:
-        ann.update(font=dict(size=12))
+        addTrace(fig, dict(
+            type="scatter",
+            x=bin_centers,
+            y=y_data.fillna(0).values,
+            name=name,
+            mode="lines+markers",
+            line=dict(color=color, width=2),
+            marker=dict(symbol=symbol, size=10),
+        ), 5)
 
     return fig
+
+def distributionView(data, game, player, mode):
+    passes = selectRows(data, "Passes", game)
+    o_passes, d_passes = passesFiltered(passes, selectRows(data, "Possessions", game), game)
+    return [
+        genDistribution(passes, "All Passes"),
+        genDistribution(o_passes, "O Passes"),
+        genDistribution(d_passes, "D Passes"),
+    ]
@@ -0,0 +1,146 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from .constants import *
+from .density   import CELL, X_EDGES, Y_EDGES
+from .figure    import addFieldStyle, addTrace, subplots, updateAxes
+from .utils     import passCoords
+from processor  import selectRows
+
+PRIOR_WEIGHT = 3   # pseudo-observations pulling sparse cells toward the prior
+
+@dataclass(frozen=True)
+class ExpectedGrid:
+    """Chance the possession ends in a score, per field cell (x cells, y cells)."""
+    p:     np.ndarray
+    n:     np.ndarray
+    base:  float
+
+    def at(self, x, y):
+        i = np.clip((np.asarray(x) // CELL).astype(int), 0, self.p.shape[0] - 1)
+        j = np.clip((np.asarray(y) // CELL).astype(int), 0, self.p.shape[1] - 1)
+        return self.p[i, j]
+
+def smooth(a):
+    """3x3 weighted blur with edge padding, as shifted-array sums."""
+    k = np.array([1, 2, 1], dtype=float)
+    padded = np.pad(a, 1, mode="edge")
+    rows = k[0] * padded[:-2] + k[1] * padded[1:-1] + k[2] * padded[2:]
+    return (k[0] * rows[:, :-2] + k[1] * rows[:, 1:-1] + k[2] * rows[:, 2:]) / 16
+
+def observations(passes, possessions):
+    """
+    Every place the disc was held and whether that possession scored:
+    possession starts plus the end of every completed pass.
+    """
+    sx = X_MIN + possessions[STARTX].to_numpy() * (X_MAX - X_MIN)
+    sy = Y_MAX + possessions[STARTY].to_numpy() * (Y_MIN - Y_MAX)
+    s_scored = possessions["Scored?"].fillna(0).to_numpy()
+
+    scored = passes.merge(
+        possessions[["Game", "Point", "Possession", "Scored?"]],
+        on=["Game", "Point", "Possession"], how="left",
+    )["Scored?"].fillna(0).to_numpy()
+    completed = (passes["Turnover?"] != 1).to_numpy()
+    _, _, ex, ey = passCoords(passes)
+
+    x = np.concatenate([sx, ex[completed]])
+    y = np.concatenate([sy, ey[completed]])
+    s = np.concatenate([s_scored, scored[completed]]).astype(float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return x[keep], y[keep], s[keep]
+
+def buildGrid(passes, possessions, prior=None) -> ExpectedGrid:
+    x, y, s = observations(passes, possessions)
+    n, _, _      = np.histogram2d(x, y, bins=[X_EDGES, Y_EDGES])
+    scored, _, _ = np.histogram2d(x, y, bins=[X_EDGES, Y_EDGES], weights=s)
+
+    base = float(s.mean()) if len(s) else 0.0
+    if prior is None:
+        prior = np.full(n.shape, base)
+
+    n_s, scored_s = smooth(n) * 9, smooth(scored) * 9
+    p = (scored_s + PRIOR_WEIGHT * prior) / (n_s + PRIOR_WEIGHT)
+    return ExpectedGrid(p, n, base)
+
+def getGrid(data, game="All") -> ExpectedGrid:
+    """Season grid, or a game grid shrunk toward the season grid."""
+    def build():
+        prior = None if game == "All" else getGrid(data, "All").p
+        return buildGrid(
+            selectRows(data, "Passes", game),
+            selectRows(data, "Possessions", game),
+            prior,
+        )
+    return data.cached(("expected_grid", game), build)
+
+def getPassValue(data, game="All"):
+    """
+    Expected-score value added per pass: xs(end) - xs(start) for completions
+    (a goal is worth 1), -xs(start) for turnovers.
+    """
+    def build():
+        grid = getGrid(data, game)
+        passes = selectRows(data, "Passes", game)
+        sx, sy, ex, ey = passCoords(passes)
+        completed = (passes["Turnover?"] != 1).to_numpy()
+
+        start = grid.at(np.nan_to_num(sx), np.nan_to_num(sy))
+        end   = np.where(completed, grid.at(np.nan_to_num(ex), np.nan_to_num(ey)), 0.0)
+        end   = np.where(passes["Assist?"].to_numpy() == 1, 1.0, end)
+        return pd.DataFrame({
+            "Thrower":  passes["Thrower"].to_numpy(),
+            "Receiver": passes["Receiver"].to_numpy(),
+            "xs_start": start,
+            "xs_end":   end,
+            "eva":      end - start,
+        })
+    return data.cached(("pass_value", game), build)
+
+def valueRanking(values):
+    """Per-thrower total and per-throw expected value added."""
+    g = values.dropna(subset=["Thrower"]).groupby("Thrower")["eva"]
+    ranking = pd.DataFrame({"throws": g.size(), "eva": g.sum(), "eva_per_throw": g.mean()})
+    ranking = ranking.round(3).sort_values("eva", ascending=False)
+    return ranking.rename_axis("player").reset_index()
+
+def genExpectedScore(grid: ExpectedGrid, ranking, title):
+    fig = subplots(
+        rows=1, cols=2, column_widths=(0.35, 0.65),
+        titles=["Score Chance From Here", "Expected Value Added"],
+        horizontal_spacing=0.2,
+    )
+    fig["layout"].update(
+        title=dict(text=title, x=0.01, y=0.96, font=dict(size=15)),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        height=max(700, len(ranking) * 22 + 120),
+        margin=dict(l=20, r=20, t=80, b=20), showlegend=False,
+    )
+
+    cx = (X_EDGES[:-1] + X_EDGES[1:]) / 2
+    cy = (Y_EDGES[:-1] + Y_EDGES[1:]) / 2
+    pct = grid.p.T * 100
+    addTrace(fig, dict(
+        type="heatmap", x=cx, y=cy, z=pct, customdata=grid.n.T,
+        text=np.round(pct).astype(int).astype(str), texttemplate="%{text}",
+        hovertemplate="%{z:.0f}% score chance<br>%{customdata} touches<extra></extra>",
+        colorscale=[[0, RED], [0.5, LIGHTGRAY], [1, GREEN]], zmin=0, zmax=100,
+        opacity=0.85, showscale=False,
+    ), 1)
+    addFieldStyle(fig, 1)
+
+    r = ranking.iloc[::-1]
+    addTrace(fig, dict(
+        type="bar", x=r["eva"].to_numpy(), y=r["player"].to_numpy(), orientation="h",
+        marker=dict(color=np.where(r["eva"] >= 0, BLUE, RED)),
+        customdata=r[["throws", "eva_per_throw"]].to_numpy(),
+        hovertemplate="%{y}: %{x:.2f}<br>%{customdata[0]} throws, %{customdata[1]:.3f} per throw<extra></extra>",
+    ), 2)
+    updateAxes(fig, 2, x=dict(showgrid=True, gridcolor=LIGHTGRAY, zeroline=True,
+                              zerolinecolor=BACKGROUND))
+    return fig
+
+def fieldValueView(data, game, player, mode):
+    ranking = valueRanking(getPassValue(data, game))
+    return [genExpectedScore(getGrid(data, game), ranking, "Expected Score")]
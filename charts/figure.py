@@ -0,0 +1,294 @@
+"""
+Figures as plain {"data": [...], "layout": {...}} dicts.
+
+Field charts are assembled here instead of through go.Figure / add_trace,
+whose property validation costs more than building the data. Subplot grids
+come from make_subplots once per process and are copied per figure; the
+busiest grids go further and keep a LayoutTemplate, serialized once, so a
+render only serializes its traces and titles. FLATBALL_VALIDATE=1 runs
+every dict through plotly's validators and checks nothing was coerced or
+dropped (see checkFigure).
+"""
+import base64
+import copy
+import hashlib
+import json
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+from .constants import *
+
+VALIDATE = os.environ.get("FLATBALL_VALIDATE") == "1"
+
+FIELD_SHAPES = [
+    dict(type="line", x0=0, x1=40, y0=20,  y1=20,  line=dict(width=3, color=BACKGROUND)),
+    dict(type="line", x0=0, x1=40, y0=90,  y1=90,  line=dict(width=3, color=BACKGROUND)),
+    dict(type="rect", x0=0, x1=40, y0=0,   y1=110, line=dict(width=4, color=BACKGROUND)),
+]
+
+FIELD_AXES = dict(showticklabels=False, showgrid=False, showline=False, zeroline=False)
+
+@lru_cache(maxsize=None)
+def gridLayout(rows, cols, titles, **kw):
+    """make_subplots layout (template, axis domains, title annotations)."""
+    from plotly.subplots import make_subplots
+
+    return make_subplots(rows=rows, cols=cols, subplot_titles=list(titles), **kw).to_dict()["layout"]
+
+def subplots(rows=1, cols=1, titles=(), **kw):
+    """Empty figure on a cached grid. Only the template is shared between figures."""
+    base = gridLayout(rows, cols, tuple(titles), **kw)
+    layout = {k: copy.deepcopy(v) for k, v in base.items() if k != "template"}
+    layout["template"] = base["template"]
+    return {"data": [], "layout": layout}
+
+def axis(cell):
+    """Axis suffix of the n-th subplot, counted row by row from 1."""
+    return "" if cell == 1 else str(cell)
+
+def addTrace(fig, trace, cell=None):
+    """Append a trace, on the given subplot's axes if there is one."""
+    if cell:
+        n = axis(cell)
+        trace["xaxis"], trace["yaxis"] = f"x{n}", f"y{n}"
+    fig["data"].append(trace)
+
+def updateAxes(fig, cell=1, x=None, y=None):
+    n = axis(cell)
+    if x: fig["layout"].setdefault(f"xaxis{n}", {}).update(x)
+    if y: fig["layout"].setdefault(f"yaxis{n}", {}).update(y)
+
+def setTitle(fig, cell, text, size=15):
+    if isinstance(fig["layout"], Layout):
+        fig["layout"].texts[f"annotation{cell}"] = text   # size is in the template
+        return
+    ann = fig["layout"]["annotations"][cell - 1]
+    ann["text"] = text
+    ann["font"]["size"] = size
+
+def centerMarker(legend=None):
+    trace = dict(
+        type="scatter", x=[20, 20], y=[40, 70], mode="markers",
+        marker=dict(symbol="x-thin", size=12, color=GRAY, line=dict(width=1, color=GRAY)),
+        showlegend=False, hoverinfo="skip",
+    )
+    if legend:
+        trace["legend"] = legend
+    return trace
+
+def fieldLayout(fig, cell=1):
+    """Field lines and bare axes for one subplot."""
+    n = axis(cell)
+    fig["layout"].setdefault("shapes", []).extend(
+        dict(copy.deepcopy(shape), layer="below", xref=f"x{n}", yref=f"y{n}")
+        for shape in FIELD_SHAPES
+    )
+    updateAxes(fig, cell, x=dict(FIELD_AXES, range=[0, 40]), y=dict(FIELD_AXES, range=[0, 110]))
+
+def addFieldStyle(fig, cell=1, legend=None):
+    fieldLayout(fig, cell)
+    addTrace(fig, centerMarker(legend), cell)
+
+def legendEntry(name, color, group, legend=None):
+    """Line swatch with no data, so the legend shows one entry per group."""
+    trace = dict(
+        type="scatter", x=[None], y=[None], mode="lines",
+        line=dict(color=color, width=3),
+        name=name, legendgroup=group, showlegend=True,
+    )
+    if legend:
+        trace["legend"] = legend
+    return trace
+
+# ── layout templates ────────────────────────────────────────────────────────
+
+SLOT = re.compile(r'"@slot(\d+)@"')
+
+@dataclass
+class LayoutTemplate:
+    """
+    A finished layout shared by every figure of one chart type. Text that
+    changes per figure (figure title, subplot titles with counts) goes in
+    named slots: "title" and "annotation1", "annotation2", ...
+    """
+    layout: dict
+    slots: dict[str, tuple]        # slot -> path into layout
+    parts: list[str] = field(init=False, repr=False)
+    key: str = field(init=False)   # content hash, names the template to the page
+
+    def __post_init__(self):
+        marked = copy.deepcopy(self.layout)
+        for i, path in enumerate(self.slots.values()):
+            setPath(marked, path, f"@slot{i}@")
+        # even parts are layout JSON, odd parts slot numbers
+        self.parts = SLOT.split(to_json_plotly(marked))
+        self.key = hashlib.sha1("".join(self.parts).encode()).hexdigest()[:12]
+
+    def json(self, texts):
+        names = list(self.slots)
+        return "".join(
+            to_json_plotly(texts.get(names[int(p)], "")) if i % 2 else p
+            for i, p in enumerate(self.parts)
+        )
+
+    def filled(self, texts):
+        layout = copy.deepcopy(self.layout)
+        for name, path in self.slots.items():
+            setPath(layout, path, texts.get(name, ""))
+        return layout
+
+@dataclass
+class Layout:
+    """Layout of one figure: a template plus this figure's slot text."""
+    template: LayoutTemplate
+    texts: dict
+
+def setPath(d, path, value):
+    for key in path[:-1]:
+        d = d[key]
+    d[path[-1]] = value
+
+def layoutTemplate(fig, title=True):
+    """Template from a built layout, with the title and subplot titles as slots."""
+    layout = fig["layout"]
+    slots = {"title": ("title", "text")} if title else {}
+    for i in range(len(layout.get("annotations", ()))):
+        slots[f"annotation{i + 1}"] = ("annotations", i, "text")
+    return LayoutTemplate(layout, slots)
+
+def templated(template, **texts):
+    """Empty figure drawing on a cached template."""
+    return {"data": [], "layout": Layout(template, texts)}
+
+def expanded(fig):
+    """Plain dict figure, with any template filled in."""
+    layout = fig["layout"]
+    if isinstance(layout, Layout):
+        return {"data": fig["data"], "layout": layout.template.filled(layout.texts)}
+    return fig
+
+@dataclass
+class FigureJson:
+    """
+    A figure serialized once for the page. Templated figures also carry the
+    template key and their slot texts as [[path, text], ...], which is all
+    a page already showing that template needs to redraw (see main.chartDelta).
+    """
+    data: str
+    layout: str
+    height: str
+    width: str
+    template: str | None = None
+    slots: str | None = None
+
+def figureJson(fig):
+    """FigureJson of a dict spec or go.Figure."""
+    if not isinstance(fig, dict):
+        fig = fig.to_plotly_json()
+
+    layout, template, slots = fig["layout"], None, None
+    if isinstance(layout, Layout):
+        t, texts = layout.template, layout.texts
+        template = t.key
+        slots = to_json_plotly([[list(path), texts.get(name, "")] for name, path in t.slots.items()])
+        jlayout, layout = t.json(texts), t.layout
+    else:
+        jlayout = to_json_plotly(layout)
+
+    def size(key):
+        value = layout.get(key, layout.get("template", {}).get("layout", {}).get(key, "100%"))
+        return f"{value}px" if isinstance(value, (int, float)) else value
+
+    return FigureJson(to_json_plotly(fig["data"]), jlayout, size("height"), size("width"), template, slots)
+
+def figureHtml(fig, config):
+    """
+    Same markup as plotly.io.to_html(full_html=False, include_plotlyjs=False),
+    reusing the template's serialized layout where there is one. fig is a
+    figure or its FigureJson.
+    """
+    if not isinstance(fig, FigureJson):
+        fig = figureJson(fig)
+
+    div_id = str(uuid.uuid4())
+    script = (
+        f'                if (document.getElementById("{div_id}")) {{'
+        f'                    Plotly.newPlot('
+        f'                        "{div_id}",'
+        f'                        {fig.data},'
+        f'                        {fig.layout},'
+        f'                        {json.dumps(config)}'
+        f'                    )'
+        f'                }}'
+    )
+    return (
+        f'<div style="height:{fig.height}; width:{fig.width};">'
+        f'                    '
+        f'        <div id="{div_id}" class="plotly-graph-div" style="height:100%; width:100%;"></div>'
+        f'            <script>'
+        f'                window.PLOTLYENV=window.PLOTLYENV || {{}};'
+        f'                {script};'
+        f'            </script>'
+        f'        </div>'
+    )
+
+# ── debug checks ────────────────────────────────────────────────────────────
+
+def decoded(v):
+    """Base64 typed array from to_plotly_json back to numpy."""
+    arr = np.frombuffer(base64.b64decode(v["bdata"]), dtype=v["dtype"])
+    if "shape" in v:
+        arr = arr.reshape([int(s) for s in str(v["shape"]).split(",")])
+    return arr
+
+def difference(a, b, path="fig"):
+    """Path of the first place a and b differ, or None."""
+    if isinstance(a, dict) and "bdata" in a: a = decoded(a)
+    if isinstance(b, dict) and "bdata" in b: b = decoded(b)
+
+    if isinstance(a, dict) or isinstance(b, dict):
+        if not (isinstance(a, dict) and isinstance(b, dict)) or a.keys() != b.keys():
+            return path
+        for k in a:
+            found = difference(a[k], b[k], f"{path}.{k}")
+            if found:
+                return found
+        return None
+
+    if isinstance(a, (list, tuple, np.ndarray)) or isinstance(b, (list, tuple, np.ndarray)):
+        a, b = list(np.asarray(a, dtype=object)), list(np.asarray(b, dtype=object))
+        if len(a) != len(b):
+            return path
+        for i, (x, y) in enumerate(zip(a, b)):
+            found = difference(x, y, f"{path}[{i}]")
+            if found:
+                return found
+        return None
+
+    if a is None or b is None:
+        return None if a is b else path
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return None
+    return None if a == b else path
+
+def checkFigure(fig):
+    """
+    Validate a dict figure and check plotly reads it back unchanged.
+    Returns the validated go.Figure; raises ValueError on a mismatch.
+    """
+    import plotly.graph_objects as go
+
+    if not isinstance(fig, dict):
+        return fig
+    fig = expanded(fig)
+    validated = go.Figure(fig)
+    found = difference(fig, validated.to_plotly_json())
+    if found:
+        raise ValueError(f"figure spec differs from validated figure at {found}")
+    return validated
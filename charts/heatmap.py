@@ -1,5 +1,7 @@
 import plotly.graph_objects as go
 from .constants import *
+from .utils     import parsePoints
+from processor  import selectRows
 
 def heatmapFig(x, y, z, txt):
     fig = go.Figure(go.Heatmap(
@@ -49,8 +51,8 @@ def heatmapFig(x, y, z, txt):
     )
     return fig
 
-def buildPointLabels(possessions, game):
-    poss = possessions[possessions["Game"] == game].copy()
+def buildPointLabels(possessions):
+    poss = possessions.copy()
     poss["Started on offense?"] = poss["Started on offense?"].fillna(0).astype(int)
     poss["Scored?"]             = poss["Scored?"].fillna(0).astype(int)
 
@@ -106,13 +108,8 @@ def buildPointLabels(possessions, game):
 
     return labels[:-1]
 
-def perGameHeatmap(stats, possessions, game, sorted_players):
-    def parsepts(s):
-        if not s or str(s).strip() == "": return []
-        return [int(x) for x in str(s).strip('"').split(",") if x.strip()]
-
-    stats_game = stats[stats["Game"] == game]
-    poss_game = possessions[possessions["Game"] == game]
+def perGameHeatmap(stats_game, poss_game, sorted_players):
+    point_labels = buildPointLabels(poss_game)
     poss_game = poss_game[:-1]
 
     # authoritative point list from possessions, not from player stats
@@ -120,9 +117,8 @@ def perGameHeatmap(stats, possessions, game, sorted_players):
 
     player_points = {}
     for _, row in stats_game.iterrows():
-        player_points[row["Player"]] = set(parsepts(row["Points played"]))
+        player_points[row["Player"]] = set(parsePoints(row["Points played"]))
 
-    point_labels = buildPointLabels(possessions, game)
     x_labels = point_labels + [f"Total ({len(all_points)})"]
 
     matrix, text_matrix = [], []
@@ -177,7 +173,7 @@ def allGamesHeatmap(all_games, all_players, player_total, game_total, sorted_pla
     return heatmapFig(x_labels, sorted_players, matrix, text_matrix)
 
 
-def genPlaytimeHeatmap(stats, possessions, game):
+def genPlaytimeHeatmap(stats, stats_game, poss_game, game):
     all_games   = sorted(stats["Game"].unique())
     all_players = sorted(stats["Player"].unique())
 
@@ -196,4 +192,12 @@ def genPlaytimeHeatmap(stats, possessions, game):
             player_total, game_total, sorted_players,
         )
 
-    return perGameHeatmap(stats, possessions, game, sorted_players)
+    return perGameHeatmap(stats_game, poss_game, sorted_players)
+
+def playTimeView(data, game, player, mode):
+    return [genPlaytimeHeatmap(
+        data.get("Player Stats"),
+        selectRows(data, "Player Stats", game),
+        selectRows(data, "Points", game),
+        game,
+    )]
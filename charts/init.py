@@ -1,54 +1,91 @@
-from .passes       import *
-from .heatmap      import genPlaytimeHeatmap
-from .stats        import getStats
-from .utils        import buildTitle, passesFiltered
-from .distribution import genDistribution
-
-def getCharts(data, game, player):
-    figs = []
-    blocks = data.get("Defensive Blocks")
-    passes = data.get("Passes")
-    stats = data.get("Player Stats")
-    points = data.get("Points")
-    possessions = data.get("Possessions")
-    stalls = data.get("Stall Outs Against")
-
-    o_passes, d_passes = passesFiltered(passes, possessions, game)
-
-    if game != "All": 
-        possessions = possessions[possessions["Game"] == game]
-        passes = passes[passes["Game"] == game]
-
-    if player == "Touchmaps": 
-        figs.append(getStats(data, game, player))
-        figs.append(genTeamPasses(passes, "All Passes"))
-        figs.append(genTeamPasses(o_passes, "O Passes"))
-        figs.append(genTeamPasses(d_passes, "D Passes"))
-
-        return buildTitle(game, player), figs
-
-    elif player == "Play Time": 
-        figs.append(getStats(data, game, player))
-        figs.append(genPlaytimeHeatmap(stats, points, game))
-        return buildTitle(game, player), figs
-
-    elif player == "Efficiency":
-        return buildTitle(game, player), figs
-
-    elif player == "Distribution":
-        figs.append(getStats(data, game, player))
-        figs.append(genDistribution(passes, "All Passes"))
-        figs.append(genDistribution(o_passes, "O Passes"))
-        figs.append(genDistribution(d_passes, "D Passes"))
-        return buildTitle(game, player), figs
-
-    else:
-        throws = passes[passes["Thrower"] == player]
-        receps = passes[passes["Receiver"] == player]
-
-        figs.append(getStats(data, game, player))
-        figs.append(genPassesAndReceptions(throws, receps))
-        # figs.append(genPasses(throws))
-        # figs.append(genReceptions(receps))
-
-    return buildTitle(game, player), figs
+import functools
+import hashlib
+import importlib
+import time
+
+from .utils import buildTitle
+
+# view -> (module, function returning the view's figures after the stats
+# table). A module is only imported the first time one of its views is
+# drawn, so the server starts without plotly or the chart code loaded.
+VIEWS = {
+    "Touchmaps":    ("charts.passes",       "touchmapsView"),
+    "Play Time":    ("charts.heatmap",      "playTimeView"),
+    "Efficiency":   None,
+    "Distribution": ("charts.distribution", "distributionView"),
+    "Leaderboard":  ("charts.leaderboard",  "leaderboardView"),
+    "Defense":      ("charts.defense",      "defenseView"),
+    "Network":      ("charts.network",      "networkView"),
+    "Lineups":      ("charts.lineups",      "lineupsView"),
+    "Possessions":  ("charts.possessions",  "possessionsView"),
+    "Field Value":  ("charts.expected",     "fieldValueView"),
+}
+PLAYER_VIEW = ("charts.passes", "playerView")
+
+TEAM_VIEWS   = tuple(VIEWS)
+DEFAULT_VIEW = "Touchmaps"
+# team views rendered for every game after upload, along with each
+# player's charts; the other views render on first request
+PRELOAD_VIEWS = (DEFAULT_VIEW,)
+# views whose single-game charts also depend on the other games (season
+# player order, game grids shrunk toward the season grid)
+SEASON_VIEWS = ("Play Time", "Field Value")
+RENDER_MODES = ("auto", "svg", "webgl", "density")
+
+# bump whenever rendered chart output changes; fragments cached on disk
+# under any other renderVersion are ignored and pruned at startup
+CHART_VERSION = "3"
+
+# a chart target is a team view's name or, behind this prefix, a player's,
+# so cache keys keep the two apart when a player is named like a view
+PLAYER_TARGET = "player:"
+
+_loaded: dict[tuple, object] = {}
+
+def playerTarget(player):
+    return PLAYER_TARGET + player
+
+def targetPlayer(target):
+    """The player a chart target names, or None for a team view."""
+    return target[len(PLAYER_TARGET):] if target.startswith(PLAYER_TARGET) else None
+
+def loadView(spec):
+    if spec not in _loaded:
+        module, name = spec
+        _loaded[spec] = getattr(importlib.import_module(module), name)
+    return _loaded[spec]
+
+def getCharts(data, game, target, mode="auto"):
+    player = targetPlayer(target)
+    spec, name = (VIEWS[target], target) if player is None else (PLAYER_VIEW, player)
+    if spec is None:
+        return buildTitle(game, name), []
+
+    from .stats import getStats
+
+    figs = [getStats(data, game, player)]
+    figs += loadView(spec)(data, game, name, mode)
+    return buildTitle(game, name), figs
+
+@functools.cache
+def renderVersion():
+    """
+    CHART_VERSION plus everything else that changes rendered output: the
+    plotly version and the render settings read from the environment.
+    """
+    import plotly
+
+    from .figure import VALIDATE
+    from .passes import DENSITY_THRESHOLD, WEBGL_THRESHOLD
+
+    settings = (plotly.__version__, WEBGL_THRESHOLD, DENSITY_THRESHOLD, VALIDATE)
+    return f"{CHART_VERSION}-{hashlib.sha1(repr(settings).encode()).hexdigest()[:8]}"
+
+def warmViews():
+    """Import every view module ahead of first use; seconds spent per module."""
+    timings = {}
+    for spec in [("charts.stats", "getStats"), PLAYER_VIEW, *filter(None, VIEWS.values())]:
+        start = time.perf_counter()
+        loadView(spec)
+        timings.setdefault(spec[0], round(time.perf_counter() - start, 4))
+    return timings
@@ -0,0 +1,112 @@
+import pandas as pd
+import plotly.graph_objects as go
+from .constants import *
+from processor import selectRows
+
+SUM_COLS = [
+    "Throws", "Thrower errors", "Catches", "Receiver errors", "Goals",
+    "Assists", "Secondary assists", "Turnovers",
+    "Offense points played", "Defense points played",
+    "Offense points won", "Defense points won",
+    "Points played total", "Points played with touches",
+]
+
+# column -> header, in display order
+LEADER_COLS = {
+    "player":      "PLAYER",
+    "plus_minus":  "+ / -",
+    "goals":       "GOALS",
+    "assists":     "ASSISTS",
+    "blocks":      "D-BLOCKS",
+    "turnovers":   "TURNOVERS",
+    "involvement": "INVOLVEMENT",
+    "o_win_pct":   "O-WIN %",
+    "d_win_pct":   "D-WIN %",
+    "comp_pct":    "COMP %",
+    "catch_pct":   "CATCH %",
+}
+
+def pct(num, den):
+    return (num / den.where(den > 0) * 100).round().fillna(0).astype(int)
+
+def leaderboardFrame(game, stats, blocks):
+    """One row per player, same fields as PlayerStatRow, from a single groupby."""
+    if stats.empty:
+        return pd.DataFrame(columns=["game", *LEADER_COLS])
+
+    s = stats.groupby("Player")[SUM_COLS].sum()
+    b = blocks.groupby("Player").size() if not blocks.empty else pd.Series(dtype=int)
+    s["blocks"] = b.reindex(s.index, fill_value=0).astype(int)
+    return boardFromCounts(game, s)
+
+def boardFromCounts(game, s):
+    """Stat rows from SUM_COLS + "blocks" totals, one per index entry (named in "player")."""
+    completions = s["Throws"] - s["Thrower errors"]
+    catches     = s["Catches"]
+
+    board = pd.DataFrame({
+        "game":        game,
+        "player":      s.index.astype(str),
+        "plus_minus":  (s["Goals"] + s["Assists"] + s["blocks"]) - s["Turnovers"]
+                       + s["Secondary assists"] * 0.5,
+        "goals":       s["Goals"],
+        "assists":     s["Assists"],
+        "blocks":      s["blocks"],
+        "turnovers":   s["Turnovers"],
+        "involvement": pct(s["Points played with touches"], s["Points played total"]),
+        "o_win_pct":   pct(s["Offense points won"], s["Offense points played"]),
+        "d_win_pct":   pct(s["Defense points won"], s["Defense points played"]),
+        "comp_pct":    pct(completions, s["Throws"]),
+        "catch_pct":   pct(catches, catches + s["Receiver errors"]),
+    })
+    return board.reset_index(drop=True)
+
+def getLeaderboard(data, game):
+    return data.cached(
+        ("leaderboard", game),
+        lambda: leaderboardFrame(
+            game,
+            selectRows(data, "Player Stats", game),
+            selectRows(data, "Defensive Blocks", game),
+        ),
+    )
+
+def sortLeaderboard(board, sort="plus_minus", ascending=False):
+    if sort not in LEADER_COLS:
+        sort = "plus_minus"
+    return board.sort_values([sort, "player"], ascending=[ascending, True], kind="stable")
+
+def genLeaderboard(board, title):
+    ROW_H = 28
+    board = sortLeaderboard(board)
+
+    def fmt(col, values):
+        if col == "plus_minus":
+            return [f"{'+' if v >= 0 else ''}{v}" for v in values]
+        if col in ("involvement", "o_win_pct", "d_win_pct", "comp_pct", "catch_pct"):
+            return [f"{v}%" for v in values]
+        return list(values)
+
+    fig = go.Figure(go.Table(
+        columnwidth=[3] + [1] * (len(LEADER_COLS) - 1),
+        header=dict(
+            values=[f"<b>{h}</b>" for h in LEADER_COLS.values()],
+            fill_color=WHITE, align="left",
+            line=dict(width=1, color=LIGHTGRAY),
+        ),
+        cells=dict(
+            values=[fmt(c, board[c]) for c in LEADER_COLS],
+            fill_color=WHITE, align="left", height=ROW_H,
+            line=dict(width=1, color=LIGHTGRAY),
+        ),
+    ))
+    fig.update_layout(
+        title=dict(text=f"{title} ({len(board)})", x=0.01, font=dict(size=15)),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        height=(len(board) + 1) * ROW_H + 100,
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
+    return fig
+
+def leaderboardView(data, game, player, mode):
+    return [genLeaderboard(getLeaderboard(data, game), "Players")]
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from itertools import combinations
+
+import plotly.graph_objects as go
+from .constants import *
+from .utils     import parsePoints
+
+@dataclass(frozen=True)
+class Lineups:
+    """
+    Every point of the session gets one bit. Each player's points played,
+    each game's points, O points and scoring points are all bitsets
+    (Python ints), so any lineup question is an AND and a popcount.
+    """
+    players: dict[str, int]
+    games:   dict[str, int]
+    offense: int
+    scored:  int
+
+def buildLineups(points, stats) -> Lineups:
+    bit = {}
+    games, offense, scored = {}, 0, 0
+
+    for i, (game, pt, o, s) in enumerate(zip(
+        points["Game"], points["Point"],
+        points["Started on offense?"].fillna(0), points["Scored?"].fillna(0),
+    )):
+        bit[(game, int(pt))] = i
+        games[game] = games.get(game, 0) | (1 << i)
+        if o: offense |= 1 << i
+        if s: scored  |= 1 << i
+
+    players = {}
+    for game, player, played in zip(stats["Game"], stats["Player"], stats["Points played"]):
+        bits = players.get(player, 0)
+        for pt in parsePoints(played):
+            if (game, pt) in bit:
+                bits |= 1 << bit[(game, pt)]
+        players[player] = bits
+
+    return Lineups(players, games, offense, scored)
+
+def getLineups(data) -> Lineups:
+    return data.cached(("lineups",), lambda: buildLineups(
+        data.get("Points"), data.get("Player Stats"),
+    ))
+
+def gameMask(lu: Lineups, game):
+    if game == "All":
+        return (1 << max(lu.games.values(), default=0).bit_length()) - 1
+    return lu.games.get(game, 0)
+
+def lineupBits(lu: Lineups, players, mask):
+    bits = mask
+    for p in players:
+        bits &= lu.players.get(p, 0)
+    return bits
+
+def pct(num, den):
+    return round(num / den * 100) if den else 0
+
+def lineupStats(lu: Lineups, players, game="All"):
+    together = lineupBits(lu, players, gameMask(lu, game))
+    o_pts  = together & lu.offense
+    d_pts  = together & ~lu.offense
+
+    o_played, d_played = o_pts.bit_count(), d_pts.bit_count()
+    holds  = (o_pts & lu.scored).bit_count()
+    breaks = (d_pts & lu.scored).bit_count()
+
+    return {
+        "players":   list(players),
+        "points":    together.bit_count(),
+        "won":       holds + breaks,
+        "o_points":  o_played,
+        "holds":     holds,
+        "hold_pct":  pct(holds, o_played),
+        "d_points":  d_played,
+        "breaks":    breaks,
+        "break_pct": pct(breaks, d_played),
+        "win_pct":   pct(holds + breaks, o_played + d_played),
+    }
+
+def topLines(lu: Lineups, game="All", size=2, top=10, min_points=4):
+    """
+    Best lines of `size` players by points won %, then points won. Lines
+    are only extended from sub-lines that already share min_points, so
+    the search stays small across a full roster.
+    """
+    mask = gameMask(lu, game)
+    lines = [
+        ((p,), bits & mask) for p, bits in sorted(lu.players.items())
+        if (bits & mask).bit_count() >= min_points
+    ]
+    names = [line[0][0] for line in lines]
+
+    for _ in range(size - 1):
+        lines = [
+            (line + (p,), bits & lu.players[p])
+            for line, bits in lines
+            for p in names
+            if p > line[-1] and (bits & lu.players[p]).bit_count() >= min_points
+        ]
+
+    rows = [lineupStats(lu, line, game) for line, _ in lines]
+    rows.sort(key=lambda r: (r["win_pct"], r["won"], r["points"]), reverse=True)
+    return rows[:top]
+
+def genLineupTable(rows, title):
+    ROW_H = 28
+    cols = {
+        "LINE":     [" · ".join(r["players"]) for r in rows],
+        "POINTS":   [r["points"] for r in rows],
+        "WIN %":    [f"{r['win_pct']}%" for r in rows],
+        "HOLD %":   [f"{r['hold_pct']}% ({r['holds']}/{r['o_points']})" for r in rows],
+        "BREAK %":  [f"{r['break_pct']}% ({r['breaks']}/{r['d_points']})" for r in rows],
+    }
+    fig = go.Figure(go.Table(
+        columnwidth=[4, 1, 1, 2, 2],
+        header=dict(
+            values=[f"<b>{h}</b>" for h in cols],
+            fill_color=WHITE, align="left",
+            line=dict(width=1, color=LIGHTGRAY),
+        ),
+        cells=dict(
+            values=list(cols.values()),
+            fill_color=WHITE, align="left", height=ROW_H,
+            line=dict(width=1, color=LIGHTGRAY),
+        ),
+    ))
+    fig.update_layout(
+        title=dict(text=title, x=0.01, font=dict(size=15)),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        height=(len(rows) + 1) * ROW_H + 100,
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
+    return fig
+
+def lineupsView(data, game, player, mode):
+    lineups = getLineups(data)
+    return [
+        genLineupTable(topLines(lineups, game, size=2), "Top Pairs"),
+        genLineupTable(topLines(lineups, game, size=3), "Top Trios"),
+    ]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from .constants import *
+
+EDGE_COLS = ["completions", "turnovers", "gain"]
+
+def buildEdges(passes):
+    """
+    Sparse thrower x receiver matrix in COO form: one row per
+    (Game, Thrower, Receiver) pair that actually connected, holding
+    completions, turnovers and completed forward gain (m).
+    """
+    if passes.empty:
+        index = pd.MultiIndex.from_tuples([], names=["Game", "Thrower", "Receiver"])
+        return pd.DataFrame(columns=EDGE_COLS, index=index)
+
+    completed = (passes["Turnover?"] != 1).to_numpy()
+    edges = pd.DataFrame({
+        "Game":        passes["Game"].to_numpy(),
+        "Thrower":     passes["Thrower"].to_numpy(),
+        "Receiver":    passes["Receiver"].to_numpy(),
+        "completions": completed.astype(int),
+        "turnovers":   (~completed).astype(int),
+        "gain":        np.where(completed, passes["Forward distance (m)"].to_numpy(), 0.0),
+    })
+    return (
+        edges.dropna(subset=["Thrower", "Receiver"])
+             .groupby(["Game", "Thrower", "Receiver"], sort=True)[EDGE_COLS]
+             .sum()
+    )
+
+def getEdges(data, game="All"):
+    """Edges for one game (a slice of the sorted index) or summed over the season."""
+    season = data.cached(("edges",), lambda: buildEdges(data.get("Passes", pd.DataFrame())))
+
+    def build():
+        if game == "All":
+            return season.groupby(level=["Thrower", "Receiver"]).sum()
+        if game not in season.index.get_level_values("Game"):
+            return season.droplevel("Game").iloc[:0]
+        return season.xs(game, level="Game")
+
+    return data.cached(("edges", game), build)
+
+def connections(edges, player):
+    """Who a player throws to and catches from, most completions first."""
+    def side(level, other):
+        if player not in edges.index.get_level_values(level):
+            return []
+        rows = edges.xs(player, level=level).sort_values("completions", ascending=False)
+        return rows.rename_axis(other).reset_index().to_dict("records")
+
+    return {
+        "player":   player,
+        "throws":   side("Thrower", "receiver"),
+        "catches":  side("Receiver", "thrower"),
+    }
+
+def edgeMatrix(edges, players, col):
+    """Dense players x players array of one edge column (for drawing only)."""
+    pos = {p: i for i, p in enumerate(players)}
+    m = np.zeros((len(players), len(players)))
+    if len(edges):
+        t = edges.index.get_level_values("Thrower").map(pos).to_numpy()
+        r = edges.index.get_level_values("Receiver").map(pos).to_numpy()
+        m[t, r] = edges[col].to_numpy()
+    return m
+
+def genPassNetwork(edges, title):
+    players = sorted(
+        set(edges.index.get_level_values("Thrower")) |
+        set(edges.index.get_level_values("Receiver"))
+    )
+    comp = edgeMatrix(edges, players, "completions")
+    turn = edgeMatrix(edges, players, "turnovers")
+    gain = edgeMatrix(edges, players, "gain")
+
+    # busiest throwers on top, busiest receivers on the left
+    t_order = np.argsort(comp.sum(axis=1), kind="stable")
+    r_order = np.argsort(-comp.sum(axis=0), kind="stable")
+    comp, turn, gain = (m[t_order][:, r_order] for m in (comp, turn, gain))
+
+    text = np.where(comp > 0, comp.astype(int).astype(str), "")
+    fig = go.Figure(go.Heatmap(
+        z=np.where(comp > 0, comp, np.nan),
+        x=[players[i] for i in r_order],
+        y=[players[i] for i in t_order],
+        text=text, texttemplate="%{text}",
+        customdata=np.dstack([turn, gain]),
+        hovertemplate=(
+            "%{y} → %{x}<br>%{z} completions<br>%{customdata[0]} turnovers"
+            "<br>%{customdata[1]:.0f} m gained<extra></extra>"
+        ),
+        colorscale="Blues", showscale=False,
+    ))
+    fig.update_layout(
+        title=dict(text=f"{title} ({int(comp.sum())} completions)", x=0.01, font=dict(size=15)),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        xaxis=dict(title="Receiver", tickangle=-30, showgrid=False, side="top"),
+        yaxis=dict(title="Thrower", showgrid=False),
+        height=max(400, len(players) * 28 + 160),
+        margin=dict(l=60, r=20, t=140, b=20),
+    )
+    return fig
+
+def networkView(data, game, player, mode):
+    return [genPassNetwork(getEdges(data, game), "Thrower → Receiver")]
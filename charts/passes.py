@@ -1,6 +1,18 @@
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import os
+from functools import lru_cache
+
+import numpy as np
 from .constants import *
+from .density   import addDensity
+from .figure    import (addTrace, centerMarker, fieldLayout, layoutTemplate,
+                        legendEntry, setTitle, subplots, templated)
+from .utils     import passCoords, passesFiltered
+from processor  import selectRows
+
+# above this many passes in one figure, "auto" mode draws with WebGL ...
+WEBGL_THRESHOLD = int(os.environ.get("FLATBALL_WEBGL_THRESHOLD", 1500))
+# ... and above this many, binned density cells instead of arrows
+DENSITY_THRESHOLD = int(os.environ.get("FLATBALL_DENSITY_THRESHOLD", 3000))
 
 PASS_LEGEND = {
     "Throwaways": RED,
@@ -26,56 +38,85 @@ TEAM_MASKS = {
     "Other":          lambda h, s, r: ~h & ~s & ~r,
 }
 
-CENTER_MARKER = go.Scatter(
-    x=[20, 20], y=[40, 70], mode="markers",
-    marker=dict(symbol="x-thin", size=12, color=GRAY, line=dict(width=1, color=GRAY)),
-    showlegend=False, hoverinfo="skip",
-)
-
-FIELD_SHAPES = [
-    dict(type="line", x0=0, x1=40, y0=20,  y1=20,  line=dict(width=3, color=BACKGROUND)),
-    dict(type="line", x0=0, x1=40, y0=90,  y1=90,  line=dict(width=3, color=BACKGROUND)),
-    dict(type="rect", x0=0, x1=40, y0=0,   y1=110, line=dict(width=4, color=BACKGROUND)),
-]
-
-def color(row, thrower):
-    if     thrower and row['Thrower error?']:  return RED
-    if     thrower and row['Receiver error?']: return PURPLE
-    if not thrower and row['Receiver error?']: return PURPLE
-    if not thrower and row['Thrower error?']:  return RED
-    if row['Assist?']:                         return GREEN
-    short = row['Distance (m)'] < 10 or (
-        Y_MAX + row[STARTY] * (Y_MIN - Y_MAX) > Y_MAX + row[ENDY] * (Y_MIN - Y_MAX)
-    )
-    return LIGHTBLUE if short else BLUE
-
 def makeTrace(sx, sy, ex, ey, color, group):
-    return go.Scatter(
-        x=[sx, ex], y=[sy, ey],
+    return dict(
+        type="scatter", x=[sx, ex], y=[sy, ey],
         mode="lines+markers",
         line=dict(width=2, color=color),
         marker=dict(size=10, symbol="arrow-wide", angleref="previous"),
         legendgroup=group, showlegend=False,
     )
 
-def addFieldStyle(fig, row=None, col=None):
-    kw = dict(row=row, col=col) if row else {}
-    for shape in FIELD_SHAPES:
-        fig.add_shape(**shape, layer="below", **kw)
-    fig.add_trace(go.Scatter(**CENTER_MARKER.to_plotly_json()), **kw)
-    axes_kw = dict(showticklabels=False, showgrid=False, showline=False, zeroline=False)
-    fig.update_xaxes(**axes_kw, range=[0, 40],  **kw)
-    fig.update_yaxes(**axes_kw, range=[0, 110], **kw)
+def renderMode(mode, n_passes):
+    """Resolve "auto" to svg / webgl / density by pass count."""
+    if mode != "auto":
+        return mode
+    if n_passes > DENSITY_THRESHOLD: return "density"
+    if n_passes > WEBGL_THRESHOLD:   return "webgl"
+    return "svg"
+
+def passColors(data, thrower):
+    """
+    One legend color per pass: thrower / receiver error first (in that
+    order for passes, reversed for receptions), then assist, then short
+    (under 10 m or backwards) vs long.
+    """
+    t_err = data['Thrower error?'].fillna(0).astype(bool).to_numpy()
+    r_err = data['Receiver error?'].fillna(0).astype(bool).to_numpy()
+    assist = data['Assist?'].fillna(0).astype(bool).to_numpy()
+    short = (data['Distance (m)'] < 10).to_numpy() | (data[STARTY] < data[ENDY]).to_numpy()
+
+    first, second = (t_err, RED), (r_err, PURPLE)
+    if not thrower:
+        first, second = second, first
+
+    return np.select(
+        [first[0], second[0], assist, short],
+        [first[1], second[1], GREEN, LIGHTBLUE],
+        default=BLUE,
+    )
+
+def segments(starts, ends):
+    """Interleave start, end, None so one trace draws many separate lines."""
+    out = np.empty(len(starts) * 3, dtype=object)
+    out[0::3], out[1::3], out[2::3] = starts, ends, None
+    return out
+
+def buildGLBuckets(data, legend, thrower, render_order):
+    """
+    WebGL equivalent of buildBuckets: two traces per color (all the lines,
+    plus a dot at each catch end) instead of one SVG trace per pass.
+    """
+    color_to_group = {c: n for n, c in legend.items()}
+    colors = passColors(data, thrower) if len(data) else np.empty(0, dtype=object)
+    sx, sy, ex, ey = passCoords(data)
+
+    buckets, counts = {}, {}
+    for c in render_order:
+        m = colors == c
+        counts[c] = int(m.sum())
+        buckets[c] = [
+            dict(
+                type="scattergl",
+                x=segments(sx[m], ex[m]), y=segments(sy[m], ey[m]),
+                mode="lines", line=dict(width=2, color=c),
+                legendgroup=color_to_group[c], showlegend=False, hoverinfo="skip",
+            ),
+            dict(
+                type="scattergl", x=ex[m], y=ey[m],
+                mode="markers", marker=dict(size=5, color=c),
+                legendgroup=color_to_group[c], showlegend=False,
+            ),
+        ] if counts[c] else []
+    return buckets, counts
 
 def buildBuckets(data, legend, thrower, render_order):
+    """One SVG arrow trace per pass, grouped by color."""
     color_to_group = {c: n for n, c in legend.items()}
     buckets = {c: [] for c in render_order}
-    for _, row in data.iterrows():
-        sx = X_MIN + row[STARTX] * (X_MAX - X_MIN)
-        sy = Y_MAX + row[STARTY] * (Y_MIN - Y_MAX)
-        ex = X_MIN + row[ENDX]   * (X_MAX - X_MIN)
-        ey = Y_MAX + row[ENDY]   * (Y_MIN - Y_MAX)
-        c  = color(row, thrower)
+    if data.empty:
+        return buckets
+    for sx, sy, ex, ey, c in zip(*passCoords(data), passColors(data, thrower)):
         buckets[c].append(makeTrace(sx, sy, ex, ey, c, color_to_group[c]))
     return buckets
 
@@ -108,20 +149,26 @@ def buildBuckets(data, legend, thrower, render_order):
 #
 #     return fig
 
-def buildTeamFig(fig, title, data, row, col):
-    render_order = (BLUE, LIGHTBLUE, GREEN, PURPLE, RED)
-    buckets = buildBuckets(data, PASS_LEGEND, thrower=True, render_order=render_order)
+def bucketPasses(data, legend, thrower, render_order, mode):
+    """Per-color traces and counts for the svg or webgl render modes."""
+    if mode == "webgl":
+        return buildGLBuckets(data, legend, thrower, render_order)
+    buckets = buildBuckets(data, legend, thrower, render_order)
+    return buckets, {c: len(v) for c, v in buckets.items()}
 
-    for c in render_order:
-        for trace in buckets[c]:
-            fig.add_trace(trace, row=row, col=col)
-
-    total = sum(len(v) for v in buckets.values())
-    title = f"{title} ({total})"
-
-    fig.layout.annotations[col - 1].text = title
-    fig.layout.annotations[col - 1].font.size=15
-    addFieldStyle(fig, row=row, col=col)
+def buildTeamFig(fig, title, data, col, mode="svg"):
+    render_order = (BLUE, LIGHTBLUE, GREEN, PURPLE, RED)
+    if mode == "density":
+        total = addDensity(fig, data, col, showscale=(col == 1))
+    else:
+        buckets, counts = bucketPasses(data, PASS_LEGEND, True, render_order, mode)
+        for c in render_order:
+            for trace in buckets[c]:
+                addTrace(fig, trace, col)
+        total = sum(counts.values())
+
+    setTitle(fig, col, f"{title} ({total})")
+    addTrace(fig, centerMarker(), col)
 #
 # def genPasses(data):
 #     fig = buildFig("Passes", data,
@@ -135,117 +182,136 @@ def buildTeamFig(fig, title, data, row, col):
 #           legend=RECEP_LEGEND, thrower=False)
 #     return fig
 
-def genTeamPasses(data, header):
-    h = data['Huck?'] == 1
-    s = data['From sideline?'] == 1
-    r = data[STARTY] <= 0.35
-    masks = {name: fn(h, s, r) for name, fn in TEAM_MASKS.items()}
-
-    fig = make_subplots(
-        rows=1, cols=len(masks),
-        subplot_titles=list(masks.keys()),
+@lru_cache(maxsize=None)
+def teamLayout():
+    """Touchmap grid, one field per TEAM_MASKS category."""
+    fig = subplots(
+        rows=1, cols=len(TEAM_MASKS),
+        titles=TEAM_MASKS.keys(),
         horizontal_spacing=0.01, # reduce gap between subplots
     )
-    fig.update_layout(
-        title=dict(text=header, x=0.01, y=0.96, font=dict(size=15)),
+    fig["layout"].update(
+        title=dict(text="", x=0.01, y=0.96, font=dict(size=15)),
         plot_bgcolor=WHITE, paper_bgcolor=WHITE,
         height=700,#width=900, 
         margin=dict(l=10, r=10, t=80, b=20),
         legend=dict(orientation="h", x=0.01, y=-0.01)
     )
-
-    for col, (title, mask) in enumerate(masks.items(), start=1):
-        buildTeamFig(fig, title, data[mask], row=1, col=col)
-
-    for name, color in PASS_LEGEND.items():
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None], mode="lines",
-            line=dict(color=color, width=3),
-            name=name, legendgroup=name, showlegend=True,
-        ))
-
-    return fig
-
-def addFieldStyleLegend(fig, legend_ref, row, col):
-    kw = dict(row=row, col=col)
-    for shape in FIELD_SHAPES:
-        fig.add_shape(**shape, layer="below", **kw)
-
-    marker = go.Scatter(
-        x=[20, 20], y=[40, 70], mode="markers",
-        marker=dict(symbol="x-thin", size=12, color=GRAY, line=dict(width=1, color=GRAY)),
-        showlegend=False, hoverinfo="skip",
-        legend=legend_ref,
-    )
-    fig.add_trace(marker, **kw)
-
-    axes_kw = dict(showticklabels=False, showgrid=False, showline=False, zeroline=False)
-    fig.update_xaxes(**axes_kw, range=[0, 40],  **kw)
-    fig.update_yaxes(**axes_kw, range=[0, 110], **kw)
-
-
-def genPassesAndReceptions(throws, receps):
-    fig = make_subplots(
+    for col in range(1, len(TEAM_MASKS) + 1):
+        fieldLayout(fig, col)
+        setTitle(fig, col, "")
+    return layoutTemplate(fig)
+
+@lru_cache(maxsize=None)
+def playerLayout():
+    """Passes and receptions fields, each with its own legend."""
+    fig = subplots(
         rows=1, cols=2,
-        subplot_titles=["Passes", "Receptions"],
+        titles=["Passes", "Receptions"],
         horizontal_spacing=0.35,
     )
-    fig.update_layout(
+    fig["layout"].update(
         plot_bgcolor=WHITE, paper_bgcolor=WHITE,
         height=700,
         margin=dict(l=20, r=20, t=60, b=20),
         legend=dict(x=0.35, bgcolor="rgba(0,0,0,0)", borderwidth=0),
         legend2=dict(bgcolor="rgba(0,0,0,0)", borderwidth=0),
     )
+    for col in (1, 2):
+        fieldLayout(fig, col)
+        setTitle(fig, col, "")
+    return layoutTemplate(fig, title=False)
+
+def genTeamPasses(data, header, mode="auto"):
+    h = data['Huck?'] == 1
+    s = data['From sideline?'] == 1
+    r = data[STARTY] <= 0.35
+    masks = {name: fn(h, s, r) for name, fn in TEAM_MASKS.items()}
+
+    fig = templated(teamLayout(), title=header)
+
+    mode = renderMode(mode, len(data))
+    for col, (title, mask) in enumerate(masks.items(), start=1):
+        buildTeamFig(fig, title, data[mask], col=col, mode=mode)
+
+    if mode == "density":
+        return fig
+
+    for name, color in PASS_LEGEND.items():
+        addTrace(fig, legendEntry(name, color, name))
+
+    return fig
+
+
+def genPassesAndReceptions(throws, receps, mode="auto"):
+    fig = templated(playerLayout())
+
+    mode = renderMode(mode, len(throws) + len(receps))
+    if mode == "density":
+        return densityPassesAndReceptions(fig, throws, receps)
 
     render_order_p = (BLUE, LIGHTBLUE, GREEN, PURPLE, RED)
-    pass_buckets = buildBuckets(throws, PASS_LEGEND, thrower=True, render_order=render_order_p)
-    pass_counts = {c: len(v) for c, v in pass_buckets.items()}
+    pass_buckets, pass_counts = bucketPasses(throws, PASS_LEGEND, True, render_order_p, mode)
 
     for name, c in PASS_LEGEND.items():
         for trace in pass_buckets[c]:
-            trace.legend = "legend"
-            trace.legendgroup = f"p_{name}"
-            fig.add_trace(trace, row=1, col=1)
-
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None], mode="lines",
-            line=dict(color=c, width=3),
-            name=f"{name} ({pass_counts.get(c, 0)})",
-            legendgroup=f"p_{name}",
-            legend="legend",
-            showlegend=True,
-        ))
+            trace.update(legend="legend", legendgroup=f"p_{name}")
+            addTrace(fig, trace, 1)
 
-    addFieldStyleLegend(fig, "legend", row=1, col=1)
+        addTrace(fig, legendEntry(
+            f"{name} ({pass_counts.get(c, 0)})", c, f"p_{name}", legend="legend",
+        ))
 
-    pass_total = sum(pass_counts.values())
-    fig.layout.annotations[0].text = f"Passes ({pass_total})"
-    fig.layout.annotations[0].font.size = 15
+    addTrace(fig, centerMarker("legend"), 1)
+    setTitle(fig, 1, f"Passes ({sum(pass_counts.values())})")
 
     render_order_r = (BLUE, LIGHTBLUE, GREEN, RED, PURPLE)
-    recep_buckets = buildBuckets(receps, RECEP_LEGEND, thrower=False, render_order=render_order_r)
-    recep_counts = {c: len(v) for c, v in recep_buckets.items()}
+    recep_buckets, recep_counts = bucketPasses(receps, RECEP_LEGEND, False, render_order_r, mode)
 
     for name, c in RECEP_LEGEND.items():
         for trace in recep_buckets[c]:
-            trace.legend = "legend2"
-            trace.legendgroup = f"r_{name}"
-            fig.add_trace(trace, row=1, col=2)
-
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None], mode="lines",
-            line=dict(color=c, width=3),
-            name=f"{name} ({recep_counts.get(c, 0)})",
-            legendgroup=f"r_{name}",
-            legend="legend2",
-            showlegend=True,
+            trace.update(legend="legend2", legendgroup=f"r_{name}")
+            addTrace(fig, trace, 2)
+
+        addTrace(fig, legendEntry(
+            f"{name} ({recep_counts.get(c, 0)})", c, f"r_{name}", legend="legend2",
         ))
 
-    addFieldStyleLegend(fig, "legend2", row=1, col=2)
+    addTrace(fig, centerMarker("legend2"), 2)
+    setTitle(fig, 2, f"Receptions ({sum(recep_counts.values())})")
 
-    recep_total = sum(recep_counts.values())
-    fig.layout.annotations[1].text = f"Receptions ({recep_total})"
-    fig.layout.annotations[1].font.size = 15
+    return fig
+
+def densityPassesAndReceptions(fig, throws, receps):
+    """Passes binned by where they were thrown, receptions by where caught."""
+    for col, (name, data, by) in enumerate(
+        [("Passes", throws, "start"), ("Receptions", receps, "end")], start=1
+    ):
+        total = addDensity(fig, data, col, by=by, showscale=(col == 2))
+        addTrace(fig, centerMarker(), col)
+        setTitle(fig, col, f"{name} ({total})")
 
     return fig
+
+def touchmapsView(data, game, player, mode):
+    passes = selectRows(data, "Passes", game)
+    possessions = selectRows(data, "Possessions", game)
+    o_passes, d_passes = passesFiltered(passes, possessions, game)
+    return [
+        genTeamPasses(passes, "All Passes", mode),
+        genTeamPasses(o_passes, "O Passes", mode),
+        genTeamPasses(d_passes, "D Passes", mode),
+    ]
+
+def playerView(data, game, player, mode):
+    from .defense import genDefenseMaps
+
+    throws = selectRows(data, "Passes", game, "Thrower", player)
+    receps = selectRows(data, "Passes", game, "Receiver", player)
+    figs = [genPassesAndReceptions(throws, receps, mode)]
+
+    p_blocks = selectRows(data, "Defensive Blocks", game, "Player", player)
+    p_stalls = selectRows(data, "Stall Outs Against", game, "Player", player)
+    if len(p_blocks) or len(p_stalls):
+        figs.append(genDefenseMaps(p_blocks, p_stalls))
+    return figs
@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from .constants import *
+
+KEYS = ["Game", "Point", "Possession"]
+
+END_COLORS = {
+    "Goal":      GREEN,
+    "Throwaway": RED,
+    "Drop":      PURPLE,
+    "Stall":     GRAY,
+    "Other":     LIGHTGRAY,
+}
+
+@dataclass(frozen=True)
+class Chains:
+    """
+    Passes sorted once into one contiguous frame, possession i owning rows
+    offsets[i]:offsets[i + 1], plus one summary row per possession.
+    """
+    passes:  pd.DataFrame
+    offsets: np.ndarray
+    table:   pd.DataFrame
+
+    def chain(self, i):
+        return self.passes.iloc[self.offsets[i]:self.offsets[i + 1]]
+
+def endReason(poss):
+    def has(col):
+        return poss[col].notna().to_numpy() if col in poss.columns else np.zeros(len(poss), bool)
+
+    return np.select(
+        [poss["Scored?"].fillna(0).to_numpy() == 1,
+         has("Stalled out"), has("Receiver error"), has("Thrower error")],
+        ["Goal", "Stall", "Drop", "Throwaway"],
+        default="Other",
+    )
+
+def buildChains(passes, possessions) -> Chains:
+    table = possessions.sort_values(KEYS, kind="stable").reset_index(drop=True)
+    n = len(table)
+
+    # possession number of every pass, then one stable sort by (possession, time)
+    ids = table[KEYS].reset_index().rename(columns={"index": "poss"})
+    tagged = passes.merge(ids, on=KEYS, how="inner")
+    tagged["_t"] = pd.to_datetime(tagged["Created"], errors="coerce")
+    tagged = tagged.sort_values(["poss", "_t"], kind="stable").reset_index(drop=True)
+
+    idx     = tagged["poss"].to_numpy()
+    offsets = np.searchsorted(idx, np.arange(n + 1))
+    counts  = np.diff(offsets)
+
+    completed = (tagged["Turnover?"] != 1).to_numpy()
+    gain      = np.where(completed, tagged["Forward distance (m)"].to_numpy(), 0.0)
+
+    # seconds between consecutive throws of the same possession
+    # (a missing or unparseable time leaves NaN, not a huge epoch offset)
+    same = idx[1:] == idx[:-1]
+    gaps = tagged["_t"].diff().dt.total_seconds().to_numpy()[1:][same]
+    gap_owner = idx[1:][same]
+    gap_sum = np.bincount(gap_owner, weights=gaps, minlength=n)
+    gap_n   = np.bincount(gap_owner, minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tempo = np.where(gap_n > 0, gap_sum / gap_n, np.nan)
+
+    table = pd.DataFrame({
+        "Game":       table["Game"],
+        "Point":      table["Point"],
+        "Possession": table["Possession"],
+        "offense":    table["Started point on offense?"].fillna(0).astype(int),
+        "scored":     table["Scored?"].fillna(0).astype(int),
+        "end":        endReason(table),
+        "passes":     counts,
+        "gain":       np.bincount(idx, weights=gain, minlength=n).round(1),
+        "duration":   np.bincount(gap_owner, weights=gaps, minlength=n),
+        "tempo":      np.round(tempo, 1),
+    })
+
+    return Chains(tagged.drop(columns=["poss", "_t"]), offsets, table)
+
+def getChains(data) -> Chains:
+    return data.cached(("chains",), lambda: buildChains(
+        data.get("Passes"), data.get("Possessions"),
+    ))
+
+def queryPossessions(chains: Chains, game="All", end=None, offense=None):
+    """Possession rows (with positions into chains) matching every filter given."""
+    t = chains.table
+    m = np.ones(len(t), dtype=bool)
+    if game != "All":      m &= (t["Game"] == game).to_numpy()
+    if end is not None:    m &= (t["end"] == end).to_numpy()
+    if offense is not None: m &= (t["offense"] == int(offense)).to_numpy()
+    return t[m]
+
+def summarizePossessions(rows):
+    g = rows.groupby("end")
+    return pd.DataFrame({
+        "possessions": g.size(),
+        "avg_passes":  g["passes"].mean().round(1),
+        "avg_gain":    g["gain"].mean().round(1),
+        "avg_tempo":   g["tempo"].mean().round(1),
+    }).reindex([e for e in END_COLORS if e in g.groups])
+
+def genPossessions(rows, title):
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=["How Possessions End", "Passes Per Possession"],
+        horizontal_spacing=0.12,
+    )
+    fig.update_layout(
+        title=dict(text=f"{title} ({len(rows)})", x=0.01, y=0.96, font=dict(size=15)),
+        plot_bgcolor=WHITE, paper_bgcolor=WHITE,
+        height=450, barmode="stack",
+        margin=dict(l=60, r=20, t=80, b=40),
+        legend=dict(orientation="h", x=0.55, y=-0.15),
+    )
+
+    summary = summarizePossessions(rows)
+    fig.add_trace(go.Bar(
+        x=summary.index, y=summary["possessions"],
+        marker=dict(color=[END_COLORS[e] for e in summary.index]),
+        customdata=summary[["avg_passes", "avg_gain", "avg_tempo"]].to_numpy(),
+        hovertemplate=(
+            "%{x}: %{y}<br>%{customdata[0]} passes avg<br>%{customdata[1]} m gained avg"
+            "<br>%{customdata[2]} s between throws<extra></extra>"
+        ),
+        showlegend=False,
+    ), row=1, col=1)
+
+    max_passes = int(rows["passes"].max()) if len(rows) else 0
+    for end, color in END_COLORS.items():
+        sub = rows[rows["end"] == end]
+        if sub.empty:
+            continue
+        fig.add_trace(go.Histogram(
+            x=sub["passes"], name=end, marker=dict(color=color),
+            xbins=dict(start=-0.5, end=max_passes + 0.5, size=1),
+        ), row=1, col=2)
+
+    fig.update_yaxes(showgrid=True, gridcolor=LIGHTGRAY)
+    fig.update_xaxes(title_text="Passes", row=1, col=2)
+    return fig
+
+def possessionsView(data, game, player, mode):
+    chains = getChains(data)
+    return [
+        genPossessions(queryPossessions(chains, game, offense=1), "O Possessions"),
+        genPossessions(queryPossessions(chains, game, offense=0), "D Possessions"),
+    ]
@@ -1,5 +1,9 @@
+from dataclasses import dataclass
+
 import plotly.graph_objects as go
 from .constants import *
+from processor import selectRows
+from .leaderboard import getLeaderboard
 
 def statTable(left_title, left_rows, right_title, right_rows):
     ROW_H = 32 # very specific
@@ -45,26 +49,87 @@ def statTable(left_title, left_rows, right_title, right_rows):
 
     return fig
 
-def getStats(data, game, player):
-    passes      = data.get("Passes")
-    stats_df    = data.get("Player Stats")
-    possessions = data.get("Possessions")
-    points      = data.get("Points")
-    blocks_df   = data.get("Defensive Blocks")
+@dataclass(frozen=True)
+class TeamStatRow:
+    game:        str
+    hold_pct:    int
+    break_pct:   int
+    comp_pct:    int
+    huck_pct:    int
+    rz_pct:      int
+    o_clean_pct: int
+    o_dirty_pct: int
+    o_broken_pct: int
+    d_break_pct: int
+    d_clean_pct: int
+
+
+@dataclass(frozen=True)
+class PlayerStatRow:
+    game:        str
+    player:      str
+    plus_minus:  float
+    goals:       int
+    assists:     int
+    blocks:      int
+    turnovers:   int
+    involvement: int
+    o_win_pct:   int
+    d_win_pct:   int
+    comp_pct:    int
+    catch_pct:   int
+
+
+def getStats(data, game, player=None):
+    """Stats table for player, or the team's (shared by every team view) for None."""
+    return data.cached(
+        ("stats_fig", game, player),
+        lambda: statsFig(data, game, player),
+    )
+
+
+def statsFig(data, game, player=None):
+    if player is None:
+        return teamStats(getTeamStatRow(data, game))
+    return playerStats(getPlayerStatRow(data, game, player))
+
+
+def getTeamStatRow(data, game) -> TeamStatRow:
+    return data.cached(
+        ("team_stats", game),
+        lambda: teamStatRow(
+            game,
+            selectRows(data, "Passes", game),
+            selectRows(data, "Points", game),
+        ),
+    )
+
+
+def getPlayerStatRow(data, game, player) -> PlayerStatRow:
+    player = player.strip()
+    return data.cached(
+        ("player_stats", game, player),
+        lambda: playerStatRow(
+            game, player,
+            selectRows(data, "Player Stats", game, "Player", player),
+            selectRows(data, "Defensive Blocks", game, "Player", player),
+        ),
+    )
+
 
-    if game != "All":
-        passes      = passes[passes["Game"] == game]
-        stats_df    = stats_df[stats_df["Game"] == game]
-        possessions = possessions[possessions["Game"] == game]
-        points      = points[points["Game"] == game]
-        blocks_df   = blocks_df[blocks_df["Game"] == game]
+def statRows(data, kind, games):
+    """Every team row (one per game) or player row (one per player per game)."""
+    if kind == "team":
+        return [getTeamStatRow(data, g) for g in games]
 
-    if player in ("Touchmaps", "Play Time", "Efficiency", "Distribution"):
-        return teamStats(passes, possessions, points, blocks_df)
-    return playerStats(passes, stats_df, blocks_df, player)
+    return [
+        PlayerStatRow(**r)
+        for g in games
+        for r in getLeaderboard(data, g).to_dict("records")
+    ]
 
 
-def teamStats(passes, possessions, points, blocks_df) -> go.Figure:
+def teamStatRow(game, passes, points) -> TeamStatRow:
     o_points = points[points["Started on offense?"] == 1]
     d_points = points[points["Started on offense?"] == 0]
     o_played = len(o_points)
@@ -95,34 +160,37 @@ def teamStats(passes, possessions, points, blocks_df) -> go.Figure:
     o_broken_pct = round(o_broken     / o_played * 100) if o_played else 0
 
     d_clean_loss = int(((d_points["Defensive blocks"] == 0) & (d_points["Scored?"] == 0)).sum())
-    d_dirty_loss = int(((d_points["Defensive blocks"]  > 0) & (d_points["Scored?"] == 0)).sum())
     d_break      = int((d_points["Scored?"] == 1).sum())
     d_clean_pct  = round(d_clean_loss / d_played * 100) if d_played else 0
-    d_dirty_pct  = round(d_dirty_loss / d_played * 100) if d_played else 0
     d_break_pct  = round(d_break      / d_played * 100) if d_played else 0
 
+    return TeamStatRow(
+        game, hold_pct, break_pct, comp_pct, huck_pct, rz_pct,
+        o_clean_pct, o_dirty_pct, o_broken_pct, d_break_pct, d_clean_pct,
+    )
+
+
+def teamStats(row: TeamStatRow) -> go.Figure:
     left_rows = [
-        ("HOLD %", f"{hold_pct}%"),
-        ("BREAK %", f"{break_pct}%"),
-        ("COMPLETION %", f"{comp_pct}%"),
-        ("HUCK %", f"{huck_pct}%"),
-        ("REDZONE %", f"{rz_pct}%"),
+        ("HOLD %", f"{row.hold_pct}%"),
+        ("BREAK %", f"{row.break_pct}%"),
+        ("COMPLETION %", f"{row.comp_pct}%"),
+        ("HUCK %", f"{row.huck_pct}%"),
+        ("REDZONE %", f"{row.rz_pct}%"),
     ]
 
     right_rows = [
-        ("CLEAN HOLD %", f"{o_clean_pct}%"),
-        ("DIRTY HOLD %", f"{o_dirty_pct}%"),
-        ("BROKEN %", f"{o_broken_pct}%"),
-        ("BREAK %", f"{d_break_pct}%"),
-        ("CLEAN D %", f"{d_clean_pct}%"),
+        ("CLEAN HOLD %", f"{row.o_clean_pct}%"),
+        ("DIRTY HOLD %", f"{row.o_dirty_pct}%"),
+        ("BROKEN %", f"{row.o_broken_pct}%"),
+        ("BREAK %", f"{row.d_break_pct}%"),
+        ("CLEAN D %", f"{row.d_clean_pct}%"),
     ]
 
     return statTable("BIG PICTURE", left_rows, "EFFICIENCY", right_rows)
 
 
-def playerStats(passes, stats_df, blocks_df, player) -> go.Figure:
-    p = stats_df[stats_df["Player"].str.strip() == player.strip()]
-
+def playerStatRow(game, player, p, p_blocks) -> PlayerStatRow:
     def col(name):  return 0   if p.empty else int(p[name].sum())
 
     throws      = col("Throws")
@@ -140,7 +208,6 @@ def playerStats(passes, stats_df, blocks_df, player) -> go.Figure:
     pts_played  = col("Points played total")
     pts_touched = col("Points played with touches")
 
-    p_blocks     = blocks_df[blocks_df["Player"].str.strip() == player.strip()]
     total_blocks = len(p_blocks)
 
     comp_pct    = round(completions / throws * 100)        if throws            else 0
@@ -149,22 +216,30 @@ def playerStats(passes, stats_df, blocks_df, player) -> go.Figure:
     d_win_pct   = round(d_won / d_pts * 100)               if d_pts             else 0
     involvement = round(pts_touched / pts_played * 100)    if pts_played        else 0
     plus_minus  = (goals + assists + total_blocks) - turnovers + (sec_assists * 0.5)
-    pm_str      = f"{'+' if plus_minus >= 0 else ''}{plus_minus}"
+
+    return PlayerStatRow(
+        game, player, plus_minus, goals, assists, total_blocks, turnovers,
+        involvement, o_win_pct, d_win_pct, comp_pct, catch_pct,
+    )
+
+
+def playerStats(row: PlayerStatRow) -> go.Figure:
+    pm_str = f"{'+' if row.plus_minus >= 0 else ''}{row.plus_minus}"
 
     left_rows = [
         ("PLUS / MINUS", pm_str),
-        ("GOALS", goals),
-        ("ASSISTS", assists),
-        ("D-BLOCKS", total_blocks),
-        ("TURNOVERS", turnovers),
+        ("GOALS", row.goals),
+        ("ASSISTS", row.assists),
+        ("D-BLOCKS", row.blocks),
+        ("TURNOVERS", row.turnovers),
     ]
 
     right_rows = [
-        ("INVOLVEMENT", f"{involvement}%"),
-        ("O-WIN %", f"{o_win_pct}%"),
-        ("D-WIN %", f"{d_win_pct}%"),
-        ("COMP %", f"{comp_pct}%"),
-        ("CATCH %", f"{catch_pct}%"),
+        ("INVOLVEMENT", f"{row.involvement}%"),
+        ("O-WIN %", f"{row.o_win_pct}%"),
+        ("D-WIN %", f"{row.d_win_pct}%"),
+        ("COMP %", f"{row.comp_pct}%"),
+        ("CATCH %", f"{row.catch_pct}%"),
     ]
 
     return statTable("PRODUCTION", left_rows, "EFFICIENCY", right_rows)
@@ -4,6 +4,11 @@ def buildTitle(game, player):
     else:
         return f"{player} vs. {game}" if game != "All" else player
 
+def parsePoints(s):
+    """Player Stats "Points played" cell ("1,2,5") -> [1, 2, 5]."""
+    if s is None or s != s or str(s).strip() == "": return []
+    return [int(x) for x in str(s).strip('"').split(",") if x.strip()]
+
 def passesFiltered(passes, possessions, game):
     point_starts = possessions[possessions["Possession"] == 1][["Game", "Point", "Started point on offense?"]]
 
@@ -13,3 +18,13 @@ def passesFiltered(passes, possessions, game):
     d_passes = merged[merged["Started point on offense?"] == 0].drop(columns=["Started point on offense?"])
 
     return o_passes, d_passes
+
+def passCoords(data):
+    """Start / end positions of each pass in field metres (numpy arrays)."""
+    from .constants import X_MIN, X_MAX, Y_MIN, Y_MAX, STARTX, STARTY, ENDX, ENDY
+
+    sx = X_MIN + data[STARTX].to_numpy() * (X_MAX - X_MIN)
+    sy = Y_MAX + data[STARTY].to_numpy() * (Y_MIN - Y_MAX)
+    ex = X_MIN + data[ENDX].to_numpy()   * (X_MAX - X_MIN)
+    ey = Y_MAX + data[ENDY].to_numpy()   * (Y_MIN - Y_MAX)
+    return sx, sy, ex, ey
@@ -0,0 +1,111 @@
+"""
+Chunked file exports of session frames.
+
+Each writer is a generator of bytes that works through a frame CHUNK_ROWS
+rows at a time, so a season export streams out while it is produced
+instead of being built in memory first. XLSX is the exception: an xlsx
+file is a zip whose directory comes last, so openpyxl's write-only mode
+spools the whole workbook to a temporary file before the first byte goes
+out, and the finished file is then streamed from disk.
+"""
+import tempfile
+
+CHUNK_ROWS = 5000
+READ_BYTES = 1 << 16
+
+FORMATS = {
+    "csv":     ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx":    ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def csvChunks(df):
+    yield df.head(0).to_csv(index=False).encode()
+    for chunk in chunks(df):
+        yield chunk.to_csv(index=False, header=False).encode()
+
+
+class ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.parts, self.pos, self.closed = [], 0, False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+
+def arrowFrame(df):
+    """Object columns as strings, so every chunk has the same Arrow schema."""
+    obj = [c for c in df.columns if df[c].dtype == object]
+    return df.astype({c: "string" for c in obj}) if obj else df
+
+
+def parquetChunks(df):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = arrowFrame(df)
+    schema = pa.Schema.from_pandas(df.head(0), preserve_index=False)
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def xlsxChunks(frames: dict):
+    """One sheet per file type; nothing is yielded until all are written."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for file_type, df in frames.items():
+        ws = wb.create_sheet(file_type[:31])
+        ws.append([str(c) for c in df.columns])
+        for chunk in chunks(df):
+            rows = chunk.astype(object).where(chunk.notna(), None)
+            for row in rows.itertuples(index=False):
+                ws.append(list(row))
+
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        while block := f.read(READ_BYTES):
+            yield block
+
+
+def exportChunks(frames, fmt):
+    """
+    Bytes in fmt of the frames dict that frames() returns, called for the
+    first chunk so the rows are selected in whichever thread iterates (a
+    worker thread under StreamingResponse). csv and parquet take a single
+    frame.
+    """
+    frames = frames()
+    if fmt == "xlsx":
+        yield from xlsxChunks(frames)
+        return
+    (df,) = frames.values()
+    yield from csvChunks(df) if fmt == "csv" else parquetChunks(df)
@@ -0,0 +1,317 @@
+"""
+Local load test: start a server, upload sample sessions, then replay click
+streams against /charts/{session_id} from many simulated users at once.
+
+Each user follows the links in the page it was just served, like a coach
+clicking through the games bar and the players panel: mostly view and
+player switches, sometimes another game. Reports latency percentiles,
+cache hit ratio (X-Chart-Cache: charts served from memory or the
+fragment store without a render), throughput and the server's memory
+growth, and saves them as JSON so runs can be compared. Needs only the
+standard library; the server runs in its own process.
+
+    python loadtest.py --users 16 --clicks 40 --sessions 4
+    python loadtest.py --users 16 --compare .cache/loadtest/<earlier>.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+
+SAMPLES = Path(__file__).parent / "samplefiles"
+RESULTS = Path(__file__).parent / ".cache" / "loadtest"
+
+LINK_RE = re.compile(r'hx-get="(/charts/[^"]+)"')
+# opponent in a Statto export's file name (processor.FILENAME_RE, minus pandas)
+GAME_RE = re.compile(r" vs\. (.+?) \d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}\.csv$", re.IGNORECASE)
+HITS = ("memory", "store")   # X-Chart-Cache values served without a render
+
+
+# ── http ─────────────────────────────────────────────────────────────────────
+
+def request(base, path, body=None, headers=None, timeout=300):
+    """(status, headers, text) for one request; path is quoted here."""
+    url = base + quote(path, safe="/?=&%")
+    req = urllib.request.Request(url, data=body, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.headers, resp.read().decode()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.headers, exc.read().decode()
+
+
+def multipart(files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, content in files:
+        parts += [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; '
+            f'filename="{name}"\r\nContent-Type: text/csv\r\n\r\n'.encode(),
+            content, b"\r\n",
+        ]
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+# ── server ───────────────────────────────────────────────────────────────────
+
+def startServer(port, workers, store):
+    env = dict(os.environ, FLATBALL_STORE=store)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=Path(__file__).parent, env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            if request(base, "/api/startup", timeout=1)[0] == 200:
+                return proc, base
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("server did not start")
+
+
+def treeRss(pid) -> int | None:
+    """Resident bytes of pid and its children (uvicorn workers), from /proc."""
+    try:
+        parents = {}
+        for entry in os.scandir("/proc"):
+            if entry.name.isdigit():
+                with open(f"/proc/{entry.name}/stat") as f:
+                    parents[int(entry.name)] = int(f.read().rsplit(")", 1)[1].split()[1])
+    except OSError:
+        return None
+
+    tree, todo = set(), [pid]
+    while todo:
+        p = todo.pop()
+        tree.add(p)
+        todo += [c for c, parent in parents.items() if parent == p and c not in tree]
+
+    total = 0
+    for p in tree:
+        try:
+            with open(f"/proc/{p}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            pass
+    return total
+
+
+class MemorySampler(threading.Thread):
+    """Peak of treeRss every interval seconds until stopped."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.start_rss = self.peak = treeRss(pid)
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            rss = treeRss(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+
+
+# ── sessions and users ───────────────────────────────────────────────────────
+
+def sampleGames():
+    games = {}
+    for path in sorted(SAMPLES.glob("*.csv")):
+        m = GAME_RE.search(path.name)
+        if m:
+            games.setdefault(m.group(1), []).append(path)
+    return games
+
+
+def uploadSession(base, games, rng):
+    """Upload a random subset of the sample games; returns the first page's chart link."""
+    picked = rng.sample(sorted(games), rng.randint(min(2, len(games)), len(games)))
+    files = [(p.name, p.read_bytes()) for g in picked for p in games[g]]
+    body, ctype = multipart(files)
+    _, _, html = request(base, "/upload", body, {"Content-Type": ctype})
+    job_id = re.search(r'hx-get="/upload/([^"]+)"', html).group(1)
+
+    while True:
+        _, _, text = request(base, f"/api/upload/{job_id}")
+        job = json.loads(text)
+        if job["status"] == "ready":
+            break
+        if job["status"] == "failed":
+            raise SystemExit(f"upload failed: {job['error']}")
+        time.sleep(0.2)
+
+    _, _, html = request(base, f"/upload/{job_id}")
+    return LINK_RE.search(html).group(1)
+
+
+def clickStream(base, start, clicks, game_share, think, rng, results):
+    """One user: open start, then follow clicks links from each page served."""
+    url = start
+    for _ in range(clicks + 1):
+        t = time.perf_counter()
+        try:
+            status, headers, html = request(base, url)
+            cache = headers.get("X-Chart-Cache")
+        except OSError as exc:
+            status, cache, html = str(exc), None, ""
+        results.append((time.perf_counter() - t, status, cache))
+
+        links = [l.replace("&amp;", "&") for l in LINK_RE.findall(html)]
+        if not links:
+            return
+        game = parse_qs(urlsplit(url).query).get("game")
+        other_games = [l for l in links if parse_qs(urlsplit(l).query).get("game") != game]
+        same_game   = [l for l in links if l not in other_games and l != url]
+        pool = other_games if other_games and (rng.random() < game_share or not same_game) else same_game
+        url = rng.choice(pool or links)
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+
+
+# ── report ───────────────────────────────────────────────────────────────────
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def summarize(results, seconds, memory, server_cache, args):
+    ok = [r for r in results if r[1] == 200]
+    latency = [r[0] * 1000 for r in ok]
+    hits = sum(r[2] in HITS for r in ok)
+    summary = {
+        "when":       time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings":   {k: v for k, v in vars(args).items() if k != "compare"},
+        "requests":   len(results),
+        "errors":     len(results) - len(ok),
+        "seconds":    round(seconds, 2),
+        "throughput": round(len(ok) / seconds, 2) if seconds else None,
+        "p50_ms":     percentile(latency, 50),
+        "p95_ms":     percentile(latency, 95),
+        "p99_ms":     percentile(latency, 99),
+        "max_ms":     max(latency, default=None),
+        "hit_ratio":  round(hits / len(ok), 3) if ok else None,
+        "hit_p50_ms":  percentile([r[0] * 1000 for r in ok if r[2] in HITS], 50),
+        "miss_p50_ms": percentile([r[0] * 1000 for r in ok if r[2] not in HITS], 50),
+        "server_cache": server_cache,
+        **memory,
+    }
+    return {k: round(v, 1) if k.endswith(("_ms", "_mb")) and v is not None else v
+            for k, v in summary.items()}
+
+
+REPORT_ROWS = [
+    "requests", "errors", "seconds", "throughput", "p50_ms", "p95_ms", "p99_ms",
+    "max_ms", "hit_ratio", "hit_p50_ms", "miss_p50_ms",
+    "rss_start_mb", "rss_peak_mb", "rss_end_mb", "rss_growth_mb",
+]
+
+
+def printReport(summary, baseline=None):
+    print(f"\n{'':14}{'this run':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else ""))
+    for row in REPORT_ROWS:
+        value = summary.get(row)
+        line = f"{row:14}{value if value is not None else '-':>12}"
+        old = (baseline or {}).get(row)
+        if baseline:
+            line += f"{old if old is not None else '-':>12}"
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                line += f"{(value - old) / old:>+10.0%}"
+        print(line)
+    print(f"\nserver chart cache: {summary['server_cache']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="server pid to sample memory from, with --url")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sessions", type=int, default=2, help="uploaded sessions, each a random subset of the sample games")
+    parser.add_argument("--users", type=int, default=8, help="concurrent users")
+    parser.add_argument("--clicks", type=int, default=30, help="clicks per user")
+    parser.add_argument("--game-share", type=float, default=0.3, help="share of clicks that switch game")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between a user's clicks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help=f"results file (default {RESULTS}/<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    proc = None
+    # a fresh store every run (cold caches); removed with its -wal / -shm files
+    tmp = tempfile.TemporaryDirectory(prefix="flatball-loadtest-")
+    if args.url:
+        base, pid = args.url.rstrip("/"), args.pid
+    else:
+        proc, base = startServer(args.port, args.workers, str(Path(tmp.name) / "store.sqlite3"))
+        pid = proc.pid
+
+    sampler = MemorySampler(pid) if pid else None
+    if sampler:
+        sampler.start()
+
+    try:
+        games = sampleGames()
+        starts = [uploadSession(base, games, rng) for _ in range(args.sessions)]
+        print(f"uploaded {len(starts)} sessions; {args.users} users x {args.clicks} clicks")
+
+        results = []
+        t = time.perf_counter()
+        with ThreadPoolExecutor(args.users) as pool:
+            users = [
+                pool.submit(clickStream, base, starts[i % len(starts)], args.clicks,
+                            args.game_share, args.think, random.Random(rng.random()), results)
+                for i in range(args.users)
+            ]
+        for user in users:
+            user.result()   # a user that crashed fails the run instead of shrinking it
+        seconds = time.perf_counter() - t
+
+        memory = {}
+        if sampler:
+            sampler.stop.set()
+            end = treeRss(pid)
+            mb = lambda b: None if b is None else b / 2**20
+            memory = {
+                "rss_start_mb": mb(sampler.start_rss), "rss_peak_mb": mb(sampler.peak),
+                "rss_end_mb": mb(end),
+                "rss_growth_mb": mb(end - sampler.start_rss) if end and sampler.start_rss else None,
+            }
+        server_cache = json.loads(request(base, "/api/scheduler")[2]).get("chart_cache")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+        tmp.cleanup()
+
+    summary = summarize(results, seconds, memory, server_cache, args)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    printReport(summary, baseline)
+
+    out = Path(args.out) if args.out else RESULTS / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(summary, indent=2))
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
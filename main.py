@@ -1,101 +1,658 @@
 import asyncio
+import hmac
+import html
+import importlib.util
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
 import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from pathlib import Path
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, File, Request, UploadFile
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, File, Query, Request, UploadFile
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from jinja2 import Environment, FileSystemLoader
 
-import plotly.io as pio
+import assets
+import export
+import store
+from scheduler import PRELOAD, RenderScheduler
+from charts.init import (DEFAULT_VIEW, PRELOAD_VIEWS, RENDER_MODES, SEASON_VIEWS, TEAM_VIEWS,
+                         getCharts, playerTarget, renderVersion, targetPlayer, warmViews)
 
-from charts.init import getCharts
-import processor
+# pandas, plotly and the chart modules are imported on first use (or by
+# warmUp once the server is listening), not at import time, so a worker
+# starts accepting connections as soon as FastAPI is up
 
-app = FastAPI()
-templates = Environment(loader=FileSystemLoader("templates"), cache_size=0)
+# dev mode re-reads templates on every request; production compiles them
+# once and serves a pre-rendered index page
+DEV = os.environ.get("FLATBALL_DEV") == "1"
 
+IMPORT_START = time.perf_counter()
+STARTUP: dict[str, float] = {}       # warm-up step -> seconds, see warmUp
+WARM_DELAY = float(os.environ.get("FLATBALL_WARM_DELAY", 0.5))
+
+
+def warmUp():
+    """Import the heavy modules in the background once the server is up."""
+    time.sleep(WARM_DELAY)
+    for name in ("pandas", "processor", "plotly.io"):
+        start = time.perf_counter()
+        __import__(name)
+        STARTUP[name] = round(time.perf_counter() - start, 4)
+    for name, secs in warmViews().items():
+        STARTUP[name] = secs
+    if FRAGMENT_STORE:
+        store.pruneFragments(renderVersion())
+    store.pruneSessions(SESSION_TTL, keep=[WATCH_SESSION] if WATCH_DIR else [])
+    if not DEV:
+        indexHtml()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    STARTUP["ready"] = round(time.perf_counter() - IMPORT_START, 4)
+    threading.Thread(target=warmUp, name="warm-up", daemon=True).start()
+    if WATCH_DIR:
+        stop = threading.Event()
+        threading.Thread(
+            target=watchLoop, args=(asyncio.get_running_loop(), stop),
+            name="watch", daemon=True,
+        ).start()
+    yield
+    if WATCH_DIR:
+        stop.set()
+
+
+app = FastAPI(lifespan=lifespan)
+templates = Environment(
+    loader=FileSystemLoader("templates"),
+    cache_size=0 if DEV else 400,
+    auto_reload=DEV,
+)
+
+# per-worker caches in front of the shared store (see store.py)
 SESSIONS: dict[str, dict] = {}
-CHART_CACHE: dict[tuple, str] = {}   # (session_id, game, player) -> content HTML
+ACCESSED: dict[str, float] = {}      # session id -> last request time in this worker
+PRELOADS: dict[str, dict] = {}       # session id -> preload progress, see preloadSession
+JOBS: dict[str, dict] = {}           # ingest job id -> status, see runIngest
+
+# at most this many uploads are parsed at once; the rest queue
+INGEST_LIMIT = int(os.environ.get("FLATBALL_INGEST_LIMIT", 2))
+INGEST_POOL  = ThreadPoolExecutor(max_workers=INGEST_LIMIT, thread_name_prefix="ingest")
+JOB_TTL      = 600   # seconds a finished job's status stays pollable
+COPY_CHUNK   = 2**20   # bytes per read when copying an uploaded archive
+# stored sessions are dropped this long after upload (the watched one is kept)
+SESSION_TTL  = float(os.environ.get("FLATBALL_SESSION_TTL_DAYS", 30)) * 86400
+# store reads and writes, off the event loop (see storeCall)
+STORE_POOL   = ThreadPoolExecutor(max_workers=4, thread_name_prefix="store")
+
+# every chart render and API computation goes through this queue
+SCHEDULER = RenderScheduler(int(os.environ.get("FLATBALL_RENDER_LIMIT", os.cpu_count() or 4)))
+INFLIGHT: dict[tuple, asyncio.Future] = {}   # chart cache key -> render in progress
+LOADING: dict[str, asyncio.Future] = {}      # session id -> load from the store in progress
+INFLIGHT_PRIORITY: dict[tuple, str | None] = {}   # same keys -> priority it renders at
+CHART_CACHE: dict[tuple, str] = {}   # (session_id, game, target, mode) -> content HTML, see getCharts
+CACHE_STATS = Counter()              # interactive chart requests by where the HTML came from
+DELTA_CACHE: dict[tuple, tuple | None] = {}  # same keys -> (delta JSON, template keys), or None, see chartDelta
+
+# rendered fragments also go to the store, keyed by data digest and chart
+# version, so restarts and re-uploads skip the render; off in dev mode,
+# where the chart code changes under the cache
+FRAGMENT_STORE = not DEV
+
+# game switches on the same view redraw the mounted graphs from a JSON
+# delta instead of swapping in new chart HTML (see chartDelta)
+DELTA_UPDATES = os.environ.get("FLATBALL_DELTA_UPDATES", "1") == "1"
+# deltas kept in memory; least recently used go first past this, and are
+# read back from the fragment store next time
+DELTA_LIMIT = int(os.environ.get("FLATBALL_DELTA_CACHE", 1000))
+
+# the admin endpoints answer only when FLATBALL_ADMIN_TOKEN is set, and
+# then only requests carrying it in an X-Admin-Token header
+ADMIN_TOKEN = os.environ.get("FLATBALL_ADMIN_TOKEN")
+SESSION_TAG = 8   # leading characters of a session id the admin report shows
+
+# watch mode (--watch DIR) keeps one named session in step with a folder of
+# exports, see watchLoop
+WATCH_DIR     = os.environ.get("FLATBALL_WATCH_DIR")
+WATCH_SESSION = os.environ.get("FLATBALL_WATCH_SESSION", "live")
+WATCH: dict = {}                     # watcher status, served at /api/watch
+
+
+def renderFigure(fig):
+    """Figure (go.Figure or dict spec, see charts/figure.py) -> FigureJson."""
+    from charts.figure import VALIDATE, checkFigure, figureJson
+
+    if VALIDATE:
+        fig = checkFigure(fig)
+    return figureJson(fig)
+
+
+def renderPlotly(fig_json, static=False):
+    """FigureJson -> div HTML."""
+    from charts.figure import figureHtml
 
-TEAM_VIEWS = ["Touchmaps", "Play Time", "Efficiency", "Distribution"]
+    config = {"responsive": True, "displayModeBar": False, "staticPlot": static}
+    return figureHtml(fig_json, config)
 
 
-def renderPlotly(fig, static=False):
-    return pio.to_html(
-        fig, full_html=False, include_plotlyjs=False,
-        config={"responsive": True, "displayModeBar": False, "staticPlot": static}
+def deltaJson(title, fig_jsons):
+    """
+    Everything a page already showing this view needs to move to another
+    game: title, every figure's traces, and the layout only where it is not
+    templated (templated ones send their slot texts).
+    """
+    figures = ",".join(
+        f'{{"data":{f.data},"template":{json.dumps(f.template)},'
+        + (f'"slots":{f.slots}}}' if f.template else f'"layout":{f.layout}}}')
+        for f in fig_jsons
     )
+    return f'{{"title":{json.dumps(title)},"figures":[{figures}]}}'
 
 
-def buildContentHtml(data, game, player) -> str:
-    """Render charts for one (game, player) combo. Returns the inner content HTML."""
+def buildContent(data, game, target, mode="auto"):
+    """
+    Render charts for one (game, view or player) combo. Returns the inner content
+    HTML, and (delta JSON, template key per figure) for in-place updates,
+    or None if the charts failed.
+    """
     title_html = charts_html = stats_html = ""
     try:
-        title, figs = getCharts(data, game, player)
+        title, figs = getCharts(data, game, target, mode)
     except Exception as exc:
-        return f'<p class="error-msg">Chart error: {exc}</p>'
+        return f'<p class="error-msg">Chart error: {exc}</p>', None
 
     if title:
         title_html = f'<div class="chart-title">{title}</div>'
-    if figs:
-        stats_html = f'<div class="stats">{renderPlotly(figs[0], True)}</div>'
-        divs = "\n".join(
-            f'<div class="chart-wrapper">{renderPlotly(f)}</div>'
-            for f in figs[1:]
-        )
-        charts_html = f'<div class="charts">{divs}</div>'
+    if not figs:
+        return title_html + '<p class="error-msg">No charts returned.</p>', None
+
+    # every team view shows the same table, so serialize it once per game
+    stats = data.cached(("stats_json", game, targetPlayer(target)), lambda: renderFigure(figs[0]))
+    stats_html = f'<div class="stats">{renderPlotly(stats, True)}</div>'
+
+    fig_jsons = [renderFigure(f) for f in figs[1:]]
+    divs = "\n".join(
+        f'<div class="chart-wrapper" data-layout="{f.template}">{renderPlotly(f)}</div>'
+        if f.template else f'<div class="chart-wrapper">{renderPlotly(f)}</div>'
+        for f in fig_jsons
+    )
+    charts_html = f'<div class="charts">{divs}</div>'
+
+    delta = None
+    if DELTA_UPDATES:
+        fig_jsons.insert(0, stats)
+        delta = deltaJson(title, fig_jsons), tuple(f.template for f in fig_jsons)
+    return title_html + stats_html + charts_html, delta
+
+
+def buildCompareHtml(data, groups, title):
+    """Comparison content HTML: stats table per entity, then the throw and distance charts."""
+    from charts.compare import compareFigures
+
+    table, *figs = compareFigures(data, groups, title)
+    divs = "\n".join(
+        f'<div class="chart-wrapper">{renderPlotly(renderFigure(f))}</div>' for f in figs
+    )
+    return (
+        f'<div class="chart-title">{title}</div>'
+        f'<div class="stats">{renderPlotly(renderFigure(table), True)}</div>'
+        f'<div class="charts">{divs}</div>'
+    )
+
+
+def cacheDelta(key, entry):
+    """Keep a DELTA_CACHE entry as most recently used, evicting past DELTA_LIMIT."""
+    DELTA_CACHE.pop(key, None)
+    DELTA_CACHE[key] = entry
+    while len(DELTA_CACHE) > DELTA_LIMIT:
+        del DELTA_CACHE[next(iter(DELTA_CACHE))]
+
+
+async def renderCached(key, data, game, target, mode, priority=None):
+    """
+    (chart HTML, where it came from) for one cache key: "memory", "store",
+    "joined" (another request's render) or "rendered" through the
+    scheduler. Concurrent requests for the same key share one lookup and
+    render.
+    """
+    def count(source):
+        if priority is None:
+            CACHE_STATS[source] += 1
+
+    if key in CHART_CACHE:
+        count("memory")
+        return CHART_CACHE[key], "memory"
+    if key in INFLIGHT:
+        count("joined")
+        if priority is None and INFLIGHT_PRIORITY.get(key) is not None:
+            # a click waiting on a preload: render it as interactive work,
+            # whether it is queued already or still in the store lookup
+            INFLIGHT_PRIORITY[key] = None
+            SCHEDULER.promote(key[0], key)
+        return (await asyncio.shield(INFLIGHT[key]))[0], "joined"
+
+    session_id = key[0]
+    task = asyncio.ensure_future(fetchContent(key, data, game, target, mode, priority))
+    INFLIGHT[key] = task
+    INFLIGHT_PRIORITY[key] = priority
+    try:
+        content, delta, source = await asyncio.shield(task)
+        count(source)
+        if SESSIONS.get(session_id) is data:   # not replaced while rendering (watch mode)
+            CHART_CACHE[key] = content
+            cacheDelta(key, delta)
+        return content, source
+    finally:
+        # the key may have been dropped and re-rendered for replaced data
+        if INFLIGHT.get(key) is task:
+            del INFLIGHT[key]
+            INFLIGHT_PRIORITY.pop(key, None)
+
+
+async def fetchContent(key, data, game, target, mode, priority=None):
+    """
+    (content, delta, "store" | "rendered") for renderCached. Another
+    worker, or this server before a restart, may already have rendered
+    the key for the same data; store reads and writes run on STORE_POOL.
+    """
+    stored_key = (data.digest, *key[1:], renderVersion())
+    if FRAGMENT_STORE:
+        shared = await storeCall(store.getFragment, stored_key)
+        if shared is not None:
+            content, delta = shared
+            return content, delta and tuple(json.loads(delta)), "store"
+
+    # read only now, as a click joining during the lookup may have promoted it
+    priority = INFLIGHT_PRIORITY.get(key, priority)
+    kw = {"priority": priority} if priority else {}
+    content, delta = await SCHEDULER.submit(key[0], buildContent, data, game, target, mode,
+                                            key=key, **kw)
+    if FRAGMENT_STORE:
+        await storeCall(store.putFragment, stored_key, content, delta and json.dumps(delta))
+    return content, delta, "rendered"
+
+
+async def chartDelta(key, data, game, target, mode, mounted):
+    """
+    (delta JSON, where it came from as in renderCached) for key. The delta
+    is None unless it fits the graphs the page has mounted (one template
+    key per graph, "" where untemplated); the caller then sends full HTML.
+    """
+    source = "memory"
+    if key in DELTA_CACHE:
+        cacheDelta(key, DELTA_CACHE[key])
     else:
-        charts_html = '<p class="error-msg">No charts returned.</p>'
+        # the same lookup or render a full page request would share, so it
+        # fills CHART_CACHE too
+        _, source = await renderCached(key, data, game, target, mode)
+    if key not in DELTA_CACHE and SESSIONS.get(key[0]) is data:
+        # the HTML is still in CHART_CACHE but its delta was evicted: read
+        # it back from the fragment store (or re-render without one), one
+        # lookup shared by concurrent requests
+        refetch = (*key, "delta")
+        task = INFLIGHT.get(refetch)
+        if task is None:
+            task = INFLIGHT[refetch] = asyncio.ensure_future(
+                fetchContent(key, data, game, target, mode)
+            )
+        try:
+            _, entry, source = await asyncio.shield(task)
+        finally:
+            if INFLIGHT.get(refetch) is task:
+                del INFLIGHT[refetch]
+        if SESSIONS.get(key[0]) is data:
+            cacheDelta(key, entry)
 
-    return title_html + stats_html + charts_html
+    entry = DELTA_CACHE.get(key)
+    if entry is None:
+        return None, source
+    delta, templates = entry
+    if len(templates) != len(mounted):
+        return None, source
+    if any(t and t != m for t, m in zip(templates, mounted)):
+        return None, source
+    return delta, source
+
+
+async def storeCall(fn, *args):
+    """
+    fn(*args) from store.py on STORE_POOL. SQLite waits up to 30s for
+    another worker's write lock, which must not hold up the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(STORE_POOL, fn, *args)
 
 
-async def preloadSession(session_id: str):
+async def getSession(session_id):
     """
-    Background task: render every (game, player) combo after upload.
-    Yields to the event loop between renders so the server stays responsive.
+    Session frames from this worker's cache, else from the shared store.
+    Concurrent requests for a session not yet loaded share one load.
     """
+    ACCESSED[session_id] = time.time()
+    data = SESSIONS.get(session_id)
+    if data is not None:
+        return data
+
+    task = LOADING.get(session_id)
+    if task is None:
+        task = LOADING[session_id] = asyncio.ensure_future(storeCall(loadSession, session_id))
+        task.add_done_callback(
+            lambda t: LOADING.pop(session_id) if LOADING.get(session_id) is t else None
+        )
+    loaded = await asyncio.shield(task)
+    return None if loaded is None else SESSIONS.setdefault(session_id, loaded)
+
+
+def loadSession(session_id):
+    """Runs on STORE_POOL: a stored session, prepared like a fresh upload."""
+    frames = store.getSession(session_id)
+    if frames is None:
+        return None
+
+    import processor
+
+    data = processor.SessionData(frames)
+    prepare(data)
+    return data
+
+
+async def preloadSession(session_id: str, first=()):
+    """
+    Background task: render the PRELOAD_VIEWS and every player's charts
+    for each game after upload, the games in first ahead of the rest; other
+    views render when first requested. Renders queue as preloads, so the
+    scheduler runs them only when no interactive request is waiting,
+    taking turns with other sessions. Only the worker that ingested the
+    session preloads it; the others find its charts in the fragment store.
+    """
+    # read directly, not through getSession: preloading is not a visit,
+    # so it must not keep the session from looking idle
     data = SESSIONS.get(session_id)
     if data is None:
         return
 
+    import processor
+
     games   = ["All"] + processor.getGameList(data)
-    players = TEAM_VIEWS + processor.getPlayerList(data)
+    games   = [g for g in first if g in games] + [g for g in games if g not in first]
+    targets = list(PRELOAD_VIEWS) + [playerTarget(p) for p in processor.getPlayerList(data)]
+
+    progress = PRELOADS[session_id] = {
+        "state": "running", "done": 0, "total": len(games) * len(targets), "started": time.time(),
+    }
+    try:
+        for game in games:
+            for target in targets:
+                if SESSIONS.get(session_id) is not data:
+                    progress["state"] = "stopped"
+                    return   # session dropped or replaced while preloading
+                key = (session_id, game, target, "auto")
+                await renderCached(key, data, game, target, "auto", priority=PRELOAD)
+                progress["done"] += 1
+        progress["state"] = "done"
+    finally:
+        progress["finished"] = time.time()
 
-    for game in games:
-        for player in players:
-            key = (session_id, game, player)
-            if key not in CHART_CACHE:
-                # run the CPU-bound render in a thread so we don't block
-                loop = asyncio.get_event_loop()
-                content = await loop.run_in_executor(
-                    None, buildContentHtml, data, game, player
-                )
-                CHART_CACHE[key] = content
-            await asyncio.sleep(0)   # yield between each render
+
+async def replaceWatched(data, games, warnings):
+    """
+    Swap in the watched session's new data. Cached charts of games that did
+    not change are kept, except for views that read the whole season; the
+    changed games are preloaded first.
+    """
+    session_id = WATCH_SESSION
+
+    def stale(key):
+        return key[0] == session_id and (
+            games is None or key[1] in games or key[1] == "All" or key[2] in SEASON_VIEWS
+        )
+
+    SESSIONS[session_id] = data
+    ACCESSED[session_id] = time.time()
+    for cache in (CHART_CACHE, DELTA_CACHE, INFLIGHT, INFLIGHT_PRIORITY):
+        for key in [k for k in cache if stale(k)]:
+            del cache[key]
+
+    await storeCall(store.putSession, session_id, data)
+    WATCH.update(updated=time.time(), games=sorted(games or ()), warnings=warnings)
+    asyncio.create_task(preloadSession(session_id, first=sorted(games or ())))
+
+
+def watchLoop(loop, stop):
+    """
+    Watcher thread: ingest the whole folder, then re-ingest each batch of
+    changed games as it lands, handing the new data to the event loop.
+    """
+    import processor
+    import watch
+
+    folder = Path(WATCH_DIR)
+    source = watch.changeSource(folder)
+    WATCH.update(folder=str(folder.resolve()), session=WATCH_SESSION, mode=source.mode)
+
+    def apply(data, games, warnings):
+        prepare(data)
+        asyncio.run_coroutine_threadsafe(replaceWatched(data, games, warnings), loop).result()
+
+    # the first pass reads the whole folder, and so does every batch after
+    # it until one of those succeeds
+    data = None
+    try:
+        for names in itertools.chain([()], watch.batches(source, stop)):
+            games = None if data is None else watch.changedGames(names)
+            if games is not None and not games:
+                continue
+            try:
+                if games is None:
+                    fresh, warnings = processor.processUploads(watch.gameFiles(folder))
+                else:
+                    fresh, warnings = processor.processUploads(watch.gameFiles(folder, games))
+                    fresh = processor.replaceGames(data, fresh, games)
+                apply(fresh, games, warnings)
+                data = fresh
+            except Exception as exc:
+                WATCH.update(error=f"{type(exc).__name__}: {exc}", failed=time.time())
+    finally:
+        source.close()
+
+
+def renderIndex() -> str:
+    return templates.get_template("index.html").render(
+        asset=assets.assetUrl, live=WATCH_SESSION if WATCH_DIR else None,
+        delta=DELTA_UPDATES,
+    )
+
+
+INDEX_HTML = None
+
+
+def indexHtml() -> str:
+    """Index page, rendered once per worker outside dev mode."""
+    global INDEX_HTML
+    if DEV:
+        return renderIndex()
+    if INDEX_HTML is None:
+        INDEX_HTML = renderIndex()
+    return INDEX_HTML
 
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    html = templates.get_template("index.html").render(request=request)
-    return HTMLResponse(html)
+    return HTMLResponse(indexHtml())
 
 
-@app.post("/upload", response_class=HTMLResponse)
-async def upload(files: list[UploadFile] = File(...)):
-    file_list = [(f.filename or "unknown", await f.read()) for f in files]
-    file_count = len(file_list)
+@app.get("/static/{name}")
+async def static_asset(name: str, request: Request):
+    asset = assets.getAsset(name)
+    if asset is None:
+        return Response(status_code=404)
+
+    headers = {
+        "Cache-Control": assets.CACHE_CONTROL,
+        "ETag": asset.etag,
+        "Vary": "Accept-Encoding",
+    }
+    if request.headers.get("if-none-match") == asset.etag:
+        return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(asset.gz, media_type=asset.media_type, headers=headers)
+    return Response(asset.body, media_type=asset.media_type, headers=headers)
+
+
+def ingest(job, file_list):
+    """Runs on INGEST_POOL: parse the batch, updating job as files finish."""
+    import processor
+
+    job["status"] = "parsing"
+
+    store.putJob(job["id"], job)
+
+    def progress(filename, warnings):
+        job["parsed"] += 1
+        job["warnings"] = list(warnings)
+        store.putJob(job["id"], job)
+
+    try:
+        data, warnings = processor.processUploads(file_list, progress)
+    finally:
+        for _, content in file_list:
+            if hasattr(content, "close"):
+                content.close()
+    prepare(data)
+    return data, warnings
+
+
+def prepare(data):
+    """Work done once per session data at ingest, off the event loop."""
+    from charts.compare import getAggregates
+
+    data.digest
+    getAggregates(data)   # per (player, game) totals behind /compare
+
 
-    data, warnings = processor.processUploads(file_list)
+async def runIngest(job_id, file_list):
+    job = JOBS[job_id]
+    loop = asyncio.get_event_loop()
+
+    try:
+        data, warnings = await loop.run_in_executor(INGEST_POOL, ingest, job, file_list)
+    except Exception as exc:
+        job.update(status="failed", error=str(exc), finished=time.time())
+        await storeCall(store.putJob, job_id, job)
+        return
 
     session_id = str(uuid.uuid4())
     SESSIONS[session_id] = data
+    ACCESSED[session_id] = time.time()
+    await storeCall(store.putSession, session_id, data)
 
-    games   = processor.getGameList(data)
-    players = processor.getPlayerList(data)
+    job.update(status="ready", session_id=session_id, warnings=warnings,
+               finished=time.time())
+    await storeCall(store.putJob, job_id, job)
 
-    # kick off background preloading — doesn't block the upload response
+    # kick off background preloading — doesn't block anyone's requests
     asyncio.create_task(preloadSession(session_id))
 
+
+def pruneExpired():
+    """Drop finished jobs past JOB_TTL and stored sessions past SESSION_TTL."""
+    now = time.time()
+    for job_id, job in list(JOBS.items()):
+        if now - job.get("finished", now) > JOB_TTL:
+            del JOBS[job_id]
+
+    def prune():
+        store.pruneJobs(JOB_TTL)
+        store.pruneSessions(SESSION_TTL, keep=[WATCH_SESSION] if WATCH_DIR else [])
+
+    STORE_POOL.submit(prune)
+
+
+async def getJob(job_id):
+    """Job status from this worker, else from whichever worker is running it."""
+    return JOBS.get(job_id) or await storeCall(store.getJob, job_id)
+
+
+def ingestStatusHtml(job_id, job):
+    """Placeholder that polls itself until the job finishes."""
+    warn_html = "".join(f"<li>{html.escape(w)}</li>" for w in job["warnings"])
+    if warn_html:
+        warn_html = f'<ul class="warn-list">{warn_html}</ul>'
+
+    label = "Queued" if job["status"] == "queued" else "Parsing"
+    count = job["parsed"] if job["total"] is None else f'{job["parsed"]} / {job["total"]}'
+    return f"""
+    <div id="ingest-status" class="empty-state"
+         hx-get="/upload/{job_id}" hx-trigger="every 500ms" hx-swap="outerHTML">
+        <p class="loading-pulse">{label} {count} files...</p>
+        {warn_html}
+    </div>"""
+
+
+@app.post("/upload", response_class=HTMLResponse)
+async def upload(files: list[UploadFile] = File(...)):
+    import processor
+
+    file_list = []
+    for f in files:
+        name = f.filename or "unknown"
+        if processor.isArchive(name):
+            # the ingest job reads members after this request has closed its
+            # uploads, so it gets its own copy on disk, closed by ingest
+            copy = tempfile.TemporaryFile()
+            while chunk := await f.read(COPY_CHUNK):
+                copy.write(chunk)
+            copy.seek(0)
+            file_list.append((name, copy))
+        else:
+            file_list.append((name, await f.read()))
+
+    pruneExpired()
+    job_id = str(uuid.uuid4())
+    archives = any(processor.isArchive(name) for name, _ in file_list)
+    JOBS[job_id] = {
+        "id": job_id, "status": "queued", "parsed": 0,
+        "total": None if archives else len(file_list),   # unknown until unpacked
+        "warnings": [], "session_id": None,
+    }
+    await storeCall(store.putJob, job_id, JOBS[job_id])
+    asyncio.create_task(runIngest(job_id, file_list))
+
+    return HTMLResponse(ingestStatusHtml(job_id, JOBS[job_id]))
+
+
+@app.get("/upload/{job_id}", response_class=HTMLResponse)
+async def upload_status(job_id):
+    job = await getJob(job_id)
+    if job is None:
+        return HTMLResponse('<p class="error-msg">Upload expired. Re-upload files.</p>')
+
+    if job["status"] == "failed":
+        return HTMLResponse(f'<p class="error-msg">Upload failed: {html.escape(job["error"])}</p>')
+
+    if job["status"] != "ready":
+        return HTMLResponse(ingestStatusHtml(job_id, job))
+
+    session_id = job["session_id"]
+    data = await getSession(session_id)
+    if data is None:
+        return HTMLResponse('<p class="error-msg">Session expired. Re-upload files.</p>')
+
+    import processor
+
+    file_count = job["parsed"]
     status_html = f"""
     <div id="upload-status" hx-swap-oob="true" class="upload-success">
         ✓ {file_count} file{"s" if file_count != 1 else ""} uploaded
@@ -105,46 +662,498 @@ async def upload(files: list[UploadFile] = File(...)):
         status_html +
         sidebarHtml(
             session_id=session_id,
-            games=games,
-            players=players,
-            warnings=warnings,
+            games=processor.getGameList(data),
+            players=processor.getPlayerList(data),
+            warnings=job["warnings"],
             active_game="All",
-            active_player="Touchmaps",
+            active_target=DEFAULT_VIEW,
         )
     )
 
 
+@app.get("/live", response_class=HTMLResponse)
+async def live_session():
+    """Workspace for the watched folder's session, once its first ingest is done."""
+    if not WATCH_DIR:
+        return HTMLResponse('<p class="error-msg">Not watching a folder.</p>')
+
+    data = SESSIONS.get(WATCH_SESSION)
+    if data is None and "error" in WATCH:
+        # retried on the next change in the folder, or by clicking
+        return HTMLResponse(f"""
+        <div class="empty-state" hx-get="/live" hx-trigger="click" hx-swap="outerHTML">
+            <p class="error-msg">Could not read watched folder: {html.escape(WATCH["error"])}</p>
+            <p>Click to check again.</p>
+        </div>""")
+    if data is None:
+        return HTMLResponse("""
+        <div class="empty-state" hx-get="/live" hx-trigger="every 1s" hx-swap="outerHTML">
+            <p class="loading-pulse">Reading watched folder...</p>
+        </div>""")
+
+    import processor
+
+    return HTMLResponse(sidebarHtml(
+        session_id=WATCH_SESSION,
+        games=processor.getGameList(data),
+        players=processor.getPlayerList(data),
+        warnings=WATCH.get("warnings", []),
+        active_game="All",
+        active_target=DEFAULT_VIEW,
+    ))
+
+
+@app.get("/api/watch")
+async def watch_status():
+    """Watched folder, event source (inotify / poll) and the last batch of games ingested."""
+    return JSONResponse(WATCH if WATCH_DIR else {"error": "Not watching a folder"})
+
+
+@app.get("/api/upload/{job_id}")
+async def upload_job(job_id):
+    """Ingest job status as JSON, for scripts."""
+    job = await getJob(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return JSONResponse({k: v for k, v in job.items() if k not in ("id", "finished")})
+
+
 @app.get("/charts/{session_id}", response_class=HTMLResponse)
-async def charts_view(session_id, game: str = "All", player: str = "Touchmaps"):
-    data = SESSIONS.get(session_id)
+async def charts_view(request: Request, session_id, game: str = "All",
+                      view: str = DEFAULT_VIEW, player: str | None = None, mode: str = "auto"):
+    """Charts for a team view, or for one player's when player is given."""
+    data = await getSession(session_id)
     if data is None:
         return HTMLResponse('<p class="error-msg">Session expired. Re-upload files.</p>')
 
+    if mode not in RENDER_MODES:
+        mode = "auto"
+    if view not in TEAM_VIEWS:
+        view = DEFAULT_VIEW
+    target = view if player is None else playerTarget(player)
+
+    import processor
+
     games   = processor.getGameList(data)
     players = processor.getPlayerList(data)
 
-    key = (session_id, game, player)
+    # preloader may not have reached this combo yet — render it now, ahead
+    # of any queued preloads
+    key = (session_id, game, target, mode)
+    games_bar     = buildGamesBar(session_id, games, game, target, mode)
+    players_panel = buildPlayersPanel(session_id, players, game, target, mode)
 
-    if key not in CHART_CACHE:
-        # preloader hasn't reached this combo yet — render it now and cache it
-        loop = asyncio.get_event_loop()
-        content = await loop.run_in_executor(
-            None, buildContentHtml, data, game, player
-        )
-        CHART_CACHE[key] = content
+    # the page sends the template keys of its graphs when it is showing
+    # this player / view in this mode
+    mounted = request.headers.get("X-Chart-Mounted") if DELTA_UPDATES else None
+    # X-Chart-Cache says where the charts came from (see renderCached)
+    source = None
+    if mounted is not None:
+        delta, source = await chartDelta(key, data, game, target, mode, mounted.split(","))
+        if delta is not None:
+            nav = json.dumps({"games_bar": games_bar, "players_panel": players_panel})
+            return Response(
+                nav[:-1] + "," + delta[1:], media_type="application/json",
+                headers={"X-Chart-Cache": source},
+            )
+
+    content, html_source = await renderCached(key, data, game, target, mode)
+    if source in (None, "memory"):   # else the delta that did not fit was rendered here
+        source = html_source
+
+    return HTMLResponse(
+        content + games_bar + players_panel,
+        headers={"X-Chart-Cache": source},
+    )
+
+
+@app.get("/compare/{session_id}", response_class=HTMLResponse)
+async def compare_view(session_id, by: str = "players", game: str = "All",
+                       player: str = "Team", pick: list[str] = Query([])):
+    """
+    Compare the picked players (in one game, or "All") or the picked games
+    (for one player, or "Team"), drawn from the per (player, game) totals.
+    """
+    data = await getSession(session_id)
+    if data is None:
+        return HTMLResponse('<p class="error-msg">Session expired. Re-upload files.</p>')
+    if by not in ("players", "games"):
+        by = "players"
+
+    import processor
+    from charts.compare import entities
+
+    games   = processor.getGameList(data)
+    players = processor.getPlayerList(data)
+    choices = players if by == "players" else ["All"] + games
+    picks   = [p for p in pick if p in choices]
+
+    form  = compareFormHtml(session_id, games, players, by, picks, game, player)
+    panel = buildPlayersPanel(session_id, players, game, "Compare")
+    if len(picks) < 2:
+        hint = "players" if by == "players" else "games"
+        return HTMLResponse(form + f'<p class="compare-hint">Pick two or more {hint} to compare.</p>' + panel)
+
+    if by == "players":
+        title = "Players" + (f" vs. {game}" if game != "All" else "")
+        groups = entities(data, by, picks, game=game)
+    else:
+        title = f"{player} by Game"
+        groups = entities(data, by, picks, player=player)
+
+    content = await SCHEDULER.submit(session_id, buildCompareHtml, data, groups, title)
+    return HTMLResponse(form + content + panel)
+
+
+@app.get("/api/stats/{session_id}")
+async def stats_table(session_id, kind: str = "team", game: str | None = None,
+                      format: str = "json"):
+    """
+    Bulk stat rows: kind=team gives one row per game, kind=players one row
+    per player per game. Rows for "All" cover the season. Pass game= to
+    restrict to a single game.
+    """
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
+    if kind not in ("team", "players") or format not in ("json", "csv"):
+        return JSONResponse({"error": "kind must be team|players, format json|csv"}, status_code=400)
+
+    import pandas as pd
+    import processor
+    from charts.stats import statRows
+
+    games = [game] if game else ["All"] + processor.getGameList(data)
+
+    rows = await SCHEDULER.submit(session_id, statRows, data, kind, games)
+    records = [asdict(r) for r in rows]
+
+    if format == "csv":
+        return Response(pd.DataFrame(records).to_csv(index=False), media_type="text/csv")
+    return JSONResponse(records)
+
+
+@app.get("/api/leaderboard/{session_id}")
+async def leaderboard(session_id, game: str = "All", sort: str = "plus_minus",
+                      ascending: bool = False, format: str = "json"):
+    """Whole-roster stat rows for one game (or "All"), sorted by any column."""
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
+
+    from charts.leaderboard import getLeaderboard, sortLeaderboard
+
+    board = await SCHEDULER.submit(session_id, getLeaderboard, data, game)
+    board = sortLeaderboard(board, sort, ascending)
+
+    if format == "csv":
+        return Response(board.to_csv(index=False), media_type="text/csv")
+    return JSONResponse(board.to_dict("records"))
+
+
+@app.get("/api/network/{session_id}")
+async def pass_network(session_id, game: str = "All", player: str | None = None):
+    """Thrower -> receiver edges, or one player's connection lists."""
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
+
+    from charts.network import connections, getEdges
+
+    edges = await SCHEDULER.submit(session_id, getEdges, data, game)
+
+    if player:
+        return JSONResponse(connections(edges, player.strip()))
+    return JSONResponse(edges.reset_index().to_dict("records"))
+
+
+@app.get("/api/lineups/{session_id}")
+async def lineups(session_id, game: str = "All", players: str | None = None,
+                  size: int = 2, top: int = 10, min_points: int = 4):
+    """
+    Hold / break numbers for one line (players=A,B,C) or the top lines of
+    a given size.
+    """
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
+
+    from charts.lineups import getLineups, lineupStats, topLines
+
+    lu = await SCHEDULER.submit(session_id, getLineups, data)
+
+    if players:
+        line = [p.strip() for p in players.split(",") if p.strip()]
+        return JSONResponse(lineupStats(lu, line, game))
+
+    size = max(1, min(size, 5))
+    rows = await SCHEDULER.submit(session_id, topLines, lu, game, size, top, min_points)
+    return JSONResponse(rows)
+
+
+@app.get("/api/possessions/{session_id}")
+async def possessions(session_id, game: str = "All", end: str | None = None,
+                      offense: bool | None = None, passes: bool = False):
+    """
+    Possession rows (passes, gain, tempo, end reason) filtered by game,
+    end reason and O/D, with a per-end-reason summary. passes=true adds
+    each possession's pass chain.
+    """
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
+
+    from charts.possessions import getChains, queryPossessions, summarizePossessions
+
+    chains = await SCHEDULER.submit(session_id, getChains, data)
+    rows = queryPossessions(chains, game, end, offense)
+
+    records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+    if passes:
+        for rec, i in zip(records, rows.index):
+            chain = chains.chain(i)[["Thrower", "Receiver", "Turnover?", "Forward distance (m)"]]
+            rec["chain"] = chain.astype(object).where(chain.notna(), None).to_dict("records")
+
+    summary = summarizePossessions(rows)
+    return JSONResponse({
+        "summary": summary.astype(object).where(summary.notna(), None).reset_index().to_dict("records"),
+        "possessions": records,
+    })
+
+
+@app.get("/api/expected/{session_id}")
+async def expected_score(session_id, game: str = "All"):
+    """Expected-score grid (rows = x cells) and players ranked by value added."""
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
 
-    games_bar     = buildGamesBar(session_id, games, game, player)
-    players_panel = buildPlayersPanel(session_id, players, game, player)
+    from charts.expected import getGrid, getPassValue, valueRanking
 
-    return HTMLResponse(CHART_CACHE[key] + games_bar + players_panel)
+    grid   = await SCHEDULER.submit(session_id, getGrid, data, game)
+    values = await SCHEDULER.submit(session_id, getPassValue, data, game)
 
+    return JSONResponse({
+        "base_rate": grid.base,
+        "grid":      grid.p.round(3).tolist(),
+        "ranking":   valueRanking(values).to_dict("records"),
+    })
 
-# ── nav helpers (unchanged) ──────────────────────────────────────────────────
 
-def buildGamesBar(session_id, games, active_game, player):
+@app.get("/api/data/{session_id}/{file_type}")
+async def export_data(session_id, file_type, game: str = "All", player: str = "Team",
+                      format: str = "csv"):
+    """
+    Stream one file type's rows (filtered like getFileData) as csv, parquet
+    or xlsx. file_type=All exports every file type as one xlsx sheet each.
+    xlsx is written in full before it streams (see export.py).
+    """
+    data = await getSession(session_id)
+    if data is None:
+        return JSONResponse({"error": "Session expired"}, status_code=404)
+    if format not in export.FORMATS:
+        return JSONResponse({"error": "format must be csv|parquet|xlsx"}, status_code=400)
+
+    import processor
+
+    types = [t for t, df in data.items() if not df.empty] if file_type == "All" else [file_type]
+    if file_type == "All" and format != "xlsx":
+        return JSONResponse({"error": "file_type=All needs format=xlsx"}, status_code=400)
+    if any(t not in data for t in types):
+        return JSONResponse({"error": f"Unknown file type {file_type}"}, status_code=404)
+    if format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        return JSONResponse({"error": "Parquet export needs pyarrow installed"}, status_code=501)
+
+    def frames():
+        return {t: processor.getFileData(data, t, game, player) for t in types}
+
+    # a sync generator, so StreamingResponse runs the row selection and
+    # writing in its threadpool, off the event loop
+    media_type, ext = export.FORMATS[format]
+    name = re.sub(r"[^\w.-]+", "_", f"{file_type} {game} {player}").strip("_")
+    return StreamingResponse(
+        export.exportChunks(frames, format), media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{ext}"'},
+    )
+
+
+@app.get("/api/startup")
+async def startup_stats():
+    """Seconds from import to ready, and per-module background warm-up times."""
+    return JSONResponse(STARTUP)
+
+
+@app.get("/api/scheduler")
+async def scheduler_stats():
+    """
+    Render queue depth, in-flight renders, whether preloads are paused, and
+    interactive chart requests by source (memory, joined, store, rendered).
+    """
+    return JSONResponse({**SCHEDULER.stats(), "chart_cache": dict(CACHE_STATS)})
+
+
+# ── admin ────────────────────────────────────────────────────────────────────
+
+def processMemory():
+    """Resident and peak bytes of this worker."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024   # KiB on Linux
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = None
+    return {"rss_bytes": rss, "peak_rss_bytes": peak, "pid": os.getpid()}
+
+
+def adminDenied(request):
+    """Error response for a request not allowed to use the admin endpoints, else None."""
+    if not ADMIN_TOKEN:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse({"error": "Bad admin token"}, status_code=403)
+    return None
+
+
+def sessionReport(session_id, data, fragments, deltas, stored, now):
+    memory = data.memoryUsage() if data is not None else None
+    created = stored.get("created")
+    accessed = ACCESSED.get(session_id)
+    return {
+        # enough to tell sessions apart and evict one, not to open it
+        "session":        session_id[:SESSION_TAG],
+        "loaded":         data is not None,
+        "frame_bytes":    sum(memory["frames"].values()) if memory else None,
+        "frames":         memory["frames"] if memory else None,
+        "index_bytes":    memory["index"] if memory else None,
+        "memo_entries":   len(data.memo) if data is not None else None,
+        "fragments":      len(fragments),
+        "fragment_bytes": sum(sys.getsizeof(v) for v in fragments),
+        "delta_bytes":    sum(sys.getsizeof(v[0]) for v in deltas if v),
+        "stored_bytes":   stored.get("stored_bytes"),
+        "age_s":          round(now - created, 1) if created else None,
+        "idle_s":         round(now - accessed, 1) if accessed else None,
+        "preload":        PRELOADS.get(session_id),
+    }
+
+
+async def evictSession(session_id, scope):
+    """
+    Free a session from this worker. scope "fragments" drops its cached
+    charts, "memory" also its frames (reloaded from the store on the next
+    request), "store" deletes it everywhere.
+    """
+    for cache in (CHART_CACHE, DELTA_CACHE):
+        for key in [k for k in cache if k[0] == session_id]:
+            del cache[key]
+    if scope in ("memory", "store"):
+        SESSIONS.pop(session_id, None)
+        ACCESSED.pop(session_id, None)
+    if scope == "store":
+        PRELOADS.pop(session_id, None)
+        await storeCall(store.dropSession, session_id)
+
+
+@app.get("/api/admin")
+async def admin_report(request: Request):
+    """
+    Memory per session (frames, indexes, cached chart fragments), age, last
+    access and preload progress in this worker, plus process totals.
+    """
+    denied = adminDenied(request)
+    if denied:
+        return denied
+
+    loop = asyncio.get_running_loop()
+    stored = await storeCall(store.listSessions)
+
+    # deep frame sizes walk every string, so they are measured (once per
+    # session data) off the event loop, in the default pool: INGEST_POOL
+    # is sized for parsing uploads alone
+    loaded = list(SESSIONS.values())
+    await loop.run_in_executor(None, lambda: [d.memoryUsage() for d in loaded])
+
+    fragments: dict[str, list] = {}
+    deltas: dict[str, list] = {}
+    for cache, by_session in ((CHART_CACHE, fragments), (DELTA_CACHE, deltas)):
+        for key, value in cache.items():
+            by_session.setdefault(key[0], []).append(value)
+
+    now = time.time()
+    sessions = [
+        sessionReport(sid, SESSIONS.get(sid), fragments.get(sid, []), deltas.get(sid, []),
+                      stored.get(sid, {}), now)
+        for sid in list(SESSIONS) + [sid for sid in stored if sid not in SESSIONS]
+    ]
+    totals = {
+        **processMemory(),
+        "sessions_loaded":  sum(s["loaded"] for s in sessions),
+        "sessions_stored":  len(stored),
+        "frame_bytes":      sum(s["frame_bytes"] or 0 for s in sessions),
+        "index_bytes":      sum(s["index_bytes"] or 0 for s in sessions),
+        "fragments":        len(CHART_CACHE),
+        "fragment_bytes":   sum(sys.getsizeof(v) for v in CHART_CACHE.values()),
+        "delta_bytes":      sum(sys.getsizeof(v[0]) for v in DELTA_CACHE.values() if v),
+        "inflight_renders": len(INFLIGHT),
+        "store_fragments":  await storeCall(store.fragmentTotals),
+    }
+    return JSONResponse({"process": totals, "sessions": sessions})
+
+
+@app.delete("/api/admin/sessions/{session}")
+async def admin_evict(request: Request, session, scope: str = "memory"):
+    """
+    Evict one session, named as in the admin report (or by its full id):
+    scope=fragments|memory|store (see evictSession).
+    """
+    denied = adminDenied(request)
+    if denied:
+        return denied
+    if scope not in ("fragments", "memory", "store"):
+        return JSONResponse({"error": "scope must be fragments|memory|store"}, status_code=400)
+
+    stored = await storeCall(store.listSessions)
+    matches = [sid for sid in {*SESSIONS, *stored} if sid.startswith(session)]
+    if len(matches) != 1:
+        error = "No such session" if not matches else "Ambiguous session; give more of its id"
+        return JSONResponse({"error": error}, status_code=404 if not matches else 409)
+
+    await evictSession(matches[0], scope)
+    return JSONResponse({"evicted": matches[0][:SESSION_TAG], "scope": scope})
+
+
+@app.delete("/api/admin/sessions")
+async def admin_evict_idle(request: Request, idle: float, scope: str = "memory"):
+    """Evict every session of this worker not requested for idle seconds."""
+    denied = adminDenied(request)
+    if denied:
+        return denied
+    if scope not in ("fragments", "memory", "store"):
+        return JSONResponse({"error": "scope must be fragments|memory|store"}, status_code=400)
+    cutoff = time.time() - idle
+    doomed = [sid for sid in SESSIONS if ACCESSED.get(sid, 0) < cutoff]
+    for sid in doomed:
+        await evictSession(sid, scope)
+    return JSONResponse({"evicted": [sid[:SESSION_TAG] for sid in doomed], "scope": scope})
+
+
+# ── nav helpers ──────────────────────────────────────────────────────────────
+
+def chartsUrl(session_id, game, target, mode="auto"):
+    """/charts URL for a target: ?view= for a team view, ?player= for a player."""
+    player = targetPlayer(target)
+    query = {"game": game, **({"view": target} if player is None else {"player": player})}
+    if mode != "auto":
+        query["mode"] = mode
+    return f"/charts/{session_id}?{html.escape(urlencode(query))}"
+
+
+def buildGamesBar(session_id, games, active_game, target, mode="auto"):
     def btn(label, game_value):
         active = "active" if game_value == active_game else ""
-        url = f"/charts/{session_id}?game={game_value}&player={player}"
+        url = chartsUrl(session_id, game_value, target, mode)
         return f"""
         <button class="selector-btn {active}"
             hx-get="{url}"
@@ -161,10 +1170,10 @@ def buildGamesBar(session_id, games, active_game, player):
     </div>"""
 
 
-def buildPlayersPanel(session_id, players, game, active_player):
-    def pbtn(name, extra_class=""):
-        active = "active" if name == active_player else ""
-        url    = f"/charts/{session_id}?game={game}&player={name}"
+def buildPlayersPanel(session_id, players, game, active_target, mode="auto"):
+    def pbtn(name, target, extra_class=""):
+        active = "active" if target == active_target else ""
+        url    = chartsUrl(session_id, game, target, mode)
         return f"""
         <button class="selector-btn {extra_class} {active}"
             hx-get="{url}"
@@ -174,8 +1183,16 @@ def buildPlayersPanel(session_id, players, game, active_player):
             {name}
         </button>"""
 
-    team_buttons   = "".join(pbtn(v) for v in TEAM_VIEWS)
-    player_buttons = "".join(pbtn(p) for p in players)
+    compare_active = "active" if active_target == "Compare" else ""
+    team_buttons   = "".join(pbtn(v, v) for v in TEAM_VIEWS) + f"""
+        <button class="selector-btn {compare_active}"
+            hx-get="/compare/{session_id}?game={game}"
+            hx-target="#chart-area"
+            hx-swap="innerHTML"
+            hx-indicator="#loading">
+            Compare
+        </button>"""
+    player_buttons = "".join(pbtn(p, playerTarget(p)) for p in players)
 
     return f"""
     <aside id="players-panel" class="selector-panel" hx-swap-oob="true">
@@ -191,10 +1208,45 @@ def buildPlayersPanel(session_id, players, game, active_player):
     </aside>"""
 
 
-def sidebarHtml(session_id, games, players, warnings, active_game, active_player):
+def compareFormHtml(session_id, games, players, by, picks, game, player):
+    """Compare picker: players in a game, or games for a player / the team."""
+    def options(values, selected, label=lambda v: v):
+        return "".join(
+            f'<option value="{v}" {"selected" if v == selected else ""}>{label(v)}</option>'
+            for v in values
+        )
+
+    if by == "players":
+        scope = f'<select name="game">{options(["All"] + games, game, lambda g: "All Games" if g == "All" else f"vs. {g}")}</select>'
+        choices = [(p, p) for p in players]
+    else:
+        scope = f'<select name="player">{options(["Team"] + players, player)}</select>'
+        choices = [("All", "Season")] + [(g, f"vs. {g}") for g in games]
+
+    checks = "".join(
+        f'<label class="compare-pick"><input type="checkbox" name="pick" value="{v}"'
+        f'{" checked" if v in picks else ""} /> {label}</label>'
+        for v, label in choices
+    )
+    return f"""
+    <form class="compare-form"
+          hx-get="/compare/{session_id}"
+          hx-target="#chart-area"
+          hx-swap="innerHTML"
+          hx-trigger="change"
+          hx-indicator="#loading">
+        <div class="compare-scope">
+            <select name="by">{options(["players", "games"], by, lambda b: f"Compare {b}")}</select>
+            {scope}
+        </div>
+        <div class="compare-picks">{checks}</div>
+    </form>"""
+
+
+def sidebarHtml(session_id, games, players, warnings, active_game, active_target):
     warn_html = ""
     if warnings:
-        items = "\n".join(f"<li>{w}</li>" for w in warnings)
+        items = "\n".join(f"<li>{html.escape(w)}</li>" for w in warnings)
         warn_html = f"""
         <div class="warnings-block">
           <div class="warn-title">⚠ WARNINGS</div>
@@ -202,11 +1254,11 @@ def sidebarHtml(session_id, games, players, warnings, active_game, active_player
         </div>"""
 
     games_bar = buildGamesBar(
-        session_id, games, active_game, active_player
+        session_id, games, active_game, active_target
     ).replace('hx-swap-oob="true"', "")
 
     players_panel = buildPlayersPanel(
-        session_id, players, active_game, active_player
+        session_id, players, active_game, active_target
     ).replace('hx-swap-oob="true"', "")
 
     return f"""
@@ -216,7 +1268,7 @@ def sidebarHtml(session_id, games, players, warnings, active_game, active_player
         {players_panel}
         <section class="chart-section">
             <div id="chart-area" class="chart-area"
-                 hx-get="/charts/{session_id}?game={active_game}&player={active_player}"
+                 hx-get="{chartsUrl(session_id, active_game, active_target)}"
                  hx-trigger="load"
                  hx-swap="innerHTML">
                 <p class="loading-pulse">Loading...</p>
@@ -225,6 +1277,56 @@ def sidebarHtml(session_id, games, players, warnings, active_game, active_player
     </div>"""
 
 
+def importReport(top=15):
+    """Run `python -X importtime -c "import main"` and list the slowest modules."""
+    import subprocess
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (x.strip() for x in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name))
+
+    print(f"{'ms':>8}  module")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:8.1f}  {name}")
+
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dev", action="store_true",
+                        help="hot reload code and templates (single worker)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes sharing the session store")
+    parser.add_argument("--import-report", action="store_true",
+                        help="print the slowest imports of main and exit")
+    parser.add_argument("--watch", metavar="DIR",
+                        help="keep a session in step with the exports in DIR (single worker)")
+    parser.add_argument("--session", default="live",
+                        help="name of the watched folder's session (default: live)")
+    args = parser.parse_args()
+
+    if args.import_report:
+        importReport()
+        raise SystemExit
+
+    if args.dev:
+        os.environ["FLATBALL_DEV"] = "1"   # inherited by the reloader's worker
+    if args.watch:
+        if not Path(args.watch).is_dir():
+            parser.error(f"--watch: {args.watch} is not a directory")
+        os.environ["FLATBALL_WATCH_DIR"] = args.watch
+        os.environ["FLATBALL_WATCH_SESSION"] = args.session
+
+    uvicorn.run(
+        "main:app", host="0.0.0.0", port=8000,
+        reload=args.dev, workers=1 if args.dev or args.watch else args.workers,
+    )
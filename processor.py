@@ -1,5 +1,14 @@
+import bz2
+import gzip
+import hashlib
 import io
+import lzma
 import re
+import tarfile
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+import numpy as np
 import pandas as pd
 from urllib.parse import quote as url_quote
 
@@ -18,12 +27,120 @@ PLAYER_COLS: dict[str, str] = {
     "Stall Outs Against": "Player",
 }
 
+# columns that get a row-position index per file type (on top of "Game")
+INDEX_COLS: dict[str, tuple[str, ...]] = {
+    "Defensive Blocks":   ("Player",),
+    "Passes":             ("Thrower", "Receiver"),
+    "Player Stats":       ("Player",),
+    "Stall Outs Against": ("Player",),
+}
+
 FILENAME_RE = re.compile(
     r"^(Defensive Blocks|Passes|Player Stats|Points|Possessions|Stall Outs Against)"
     r" vs\. (.+?) (\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(\.csv)?$",
     re.IGNORECASE,
 )
 
+class SessionData(dict):
+    """
+    Uploaded frames keyed by file type. Row-position indexes are built once
+    at ingest so game / player lookups cost the size of the result, not the
+    size of the season.
+    """
+
+    def __init__(self, frames: dict[str, pd.DataFrame]):
+        super().__init__(frames)
+        self.index = buildIndexes(frames)
+        self.memo: dict[tuple, object] = {}
+
+    def cached(self, key: tuple, build):
+        """Return memo[key], computing it with build() the first time."""
+        if key not in self.memo:
+            self.memo[key] = build()
+        return self.memo[key]
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the frames; sessions with equal data share rendered charts."""
+        return self.cached(("digest",), lambda: frameDigest(self))
+
+    def memoryUsage(self) -> dict:
+        """Bytes held by each frame (deep, counting string contents) and by the indexes."""
+        def build():
+            frames = {t: int(df.memory_usage(index=True, deep=True).sum()) for t, df in self.items()}
+            index = sum(
+                rows.nbytes
+                for lookups in self.index.values()
+                for lookup in lookups.values()
+                for rows in lookup.values()
+            )
+            return {"frames": frames, "index": int(index)}
+        return self.cached(("memory",), build)
+
+
+def frameDigest(frames: dict) -> str:
+    h = hashlib.sha256()
+    for file_type in sorted(frames):
+        df = frames[file_type]
+        h.update(f"{file_type}\0{list(df.columns)}\0{len(df)}\0".encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:32]
+
+
+def buildIndexes(data: dict):
+    """
+    file type -> lookup key -> {value: row positions}
+
+    Lookup keys are "Game", each column in INDEX_COLS, and ("Game", col)
+    for the per-game player lookups.
+    """
+    index: dict[str, dict] = {}
+
+    for file_type, df in data.items():
+        if df.empty or "Game" not in df.columns:
+            continue
+
+        lookups = {"Game": df.groupby("Game", sort=False).indices}
+        for col in INDEX_COLS.get(file_type, ()):
+            if col not in df.columns:
+                continue
+            lookups[col] = df.groupby(col, sort=False).indices
+            lookups[("Game", col)] = df.groupby(["Game", col], sort=False).indices
+
+        index[file_type] = lookups
+
+    return index
+
+
+def rowPositions(data, file_type, game: str = "All", col=None, value=None):
+    """Row positions for a game and/or column value, or None for every row."""
+    if game == "All" and col is None:
+        return None
+
+    lookups = data.index.get(file_type, {})
+    if col is None:
+        lookup, key = lookups.get("Game", {}), game
+    elif game == "All":
+        lookup, key = lookups.get(col, {}), value
+    else:
+        lookup, key = lookups.get(("Game", col), {}), (game, value)
+
+    return lookup.get(key, np.empty(0, dtype=np.intp))
+
+
+def selectRows(data, file_type, game: str = "All", col=None, value=None):
+    """Index-backed equivalent of df[(df.Game == game) & (df[col] == value)]."""
+    df = data.get(file_type, pd.DataFrame())
+    if df.empty:
+        return df
+
+    if isinstance(value, str):
+        value = value.strip()
+
+    rows = rowPositions(data, file_type, game, col, value)
+    return df if rows is None else df.take(rows)
+
+
 def parseFname(filename: str):
     m = FILENAME_RE.match(filename.strip())
     if not m:
@@ -41,7 +158,119 @@ def parseFname(filename: str):
 
     return canonical, opponent, timestamp
 
-def processUploads(file_list: list[tuple[str, bytes]]):
+ARCHIVE_RE = re.compile(
+    r"\.(zip|tar|tgz|tar\.gz|tar\.bz2|tar\.xz|csv\.gz|csv\.bz2|csv\.xz)$", re.IGNORECASE
+)
+COMPRESSED_CSV_RE = re.compile(r"\.csv\.(gz|bz2|xz)$", re.IGNORECASE)
+DECOMPRESSORS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+# limits on what one archive may unpack to, against decompression bombs
+ARCHIVE_MAX_MEMBERS      = 1000
+ARCHIVE_MAX_MEMBER_BYTES = 100 * 2**20
+ARCHIVE_MAX_TOTAL_BYTES  = 500 * 2**20
+
+
+class ArchiveTooLarge(Exception):
+    pass
+
+
+def isArchive(filename: str) -> bool:
+    return bool(ARCHIVE_RE.search(filename or ""))
+
+def archiveMembers(filename: str, archive, warnings: list[str]):
+    """
+    (name, content) for each file in a zip or tar archive, or the one CSV
+    in a .csv.gz / .bz2 / .xz, decompressed as it is read; nothing is
+    extracted to disk. archive is bytes or a file object (zips need it
+    seekable). Folders and macOS metadata are skipped. A member over
+    ARCHIVE_MAX_MEMBER_BYTES uncompressed is skipped with a warning; past
+    ARCHIVE_MAX_MEMBERS files or ARCHIVE_MAX_TOTAL_BYTES in all, the rest
+    of the archive is. An unreadable archive adds a warning.
+    """
+    if isinstance(archive, bytes):
+        archive = io.BytesIO(archive)
+
+    def wanted(name):
+        path = PurePosixPath(name)
+        return path.parts[0] != "__MACOSX" and not path.name.startswith(".")
+
+    count = total = 0
+
+    def admit(name, size):
+        nonlocal count, total
+        count += 1
+        if count > ARCHIVE_MAX_MEMBERS:
+            raise ArchiveTooLarge(f"more than {ARCHIVE_MAX_MEMBERS} files")
+        if size > ARCHIVE_MAX_MEMBER_BYTES:
+            warnings.append(f"Skipped '{name}' in '{filename}': over "
+                            f"{ARCHIVE_MAX_MEMBER_BYTES >> 20} MB uncompressed")
+            return False
+        total += size
+        if total > ARCHIVE_MAX_TOTAL_BYTES:
+            raise ArchiveTooLarge(f"over {ARCHIVE_MAX_TOTAL_BYTES >> 20} MB uncompressed")
+        return True
+
+    compressed = COMPRESSED_CSV_RE.search(filename)
+    try:
+        if compressed:
+            with DECOMPRESSORS[compressed.group(1).lower()](archive) as member:
+                # one past the limit, to tell a member over it
+                body = member.read(ARCHIVE_MAX_MEMBER_BYTES + 1)
+            name = filename[:compressed.start() + len(".csv")]
+            if admit(name, len(body)):
+                yield name, body
+        elif filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    # file_size caps what zf.open decompresses, even if forged
+                    if (not info.is_dir() and wanted(info.filename)
+                            and admit(info.filename, info.file_size)):
+                        with zf.open(info) as member:
+                            yield info.filename, member
+        else:
+            with tarfile.open(fileobj=archive, mode="r|*") as tf:
+                for info in tf:
+                    if info.isfile() and wanted(info.name) and admit(info.name, info.size):
+                        # stream-mode members can't seek, which read_csv
+                        # needs, so each one is read whole (one at a time)
+                        yield info.name, tf.extractfile(info).read()
+    except ArchiveTooLarge as exc:
+        warnings.append(f"Stopped reading archive '{filename}': {exc}")
+    except (zipfile.BadZipFile, tarfile.TarError, zlib.error, lzma.LZMAError, EOFError,
+            OSError) as exc:
+        warnings.append(f"Failed to read archive '{filename}': {exc}")
+
+def parseFile(filename: str, content, warnings: list[str]):
+    """
+    One Statto export -> (file type, opponent, frame), or None with a warning.
+    content is the file's bytes or a readable file object.
+    """
+    parsed = parseFname(filename)
+    if not parsed:
+        warnings.append(f"Bad filename: '{filename}' -- skipped.")
+        return None
+
+    file_type, opponent, _ = parsed
+
+    try:
+        df = pd.read_csv(content if hasattr(content, "read") else io.BytesIO(content))
+    except Exception as exc:
+        warnings.append(f"Failed to read '{filename}': {exc}")
+        return None
+
+    for col in df.select_dtypes(include="object").columns:
+        df[col] = df[col].str.strip()
+
+    df.insert(0, "Game", opponent)
+
+    return file_type, opponent, df
+
+def processUploads(file_list: list[tuple[str, bytes]], progress=None):
+    """
+    Parse a batch of exports into a SessionData. progress(filename, warnings)
+    is called after each file, for callers reporting ingest status. Zip and
+    tar archives in the batch are parsed member by member (archiveMembers).
+    """
     combined: dict[str, list[pd.DataFrame]] = {
         t: [] for t in EXPECTED_FILE_TYPES
     }
@@ -49,103 +278,108 @@ def processUploads(file_list: list[tuple[str, bytes]]):
     warnings: list[str] = []
     games_seen: dict[str, set[str]] = {}
 
-    for filename, content in file_list:
-
-        parsed = parseFname(filename)
-        if not parsed:
-            warnings.append(f"Bad filename: '{filename}' -- skipped.")
-            continue
-
-        file_type, opponent, _ = parsed
-
-        try:
-            df = pd.read_csv(io.BytesIO(content))
-        except Exception as exc:
-            warnings.append(f"Failed to read '{filename}': {exc}")
-            continue
-
-        for col in df.select_dtypes(include="object").columns:
-            df[col] = df[col].str.strip()
+    for upload_name, upload in file_list:
+        members = (
+            archiveMembers(upload_name, upload, warnings) if isArchive(upload_name)
+            else [(upload_name, upload)]
+        )
+        for member_name, content in members:
+            filename = PurePosixPath(member_name).name
 
-        df.insert(0, "Game", opponent)
+            parsed = parseFile(filename, content, warnings)
+            if parsed:
+                file_type, opponent, df = parsed
+                combined[file_type].append(df)
+                games_seen.setdefault(opponent, set()).add(file_type)
 
-        combined[file_type].append(df)
-        games_seen.setdefault(opponent, set()).add(file_type)
+            if progress:
+                progress(filename, warnings)
 
     for game, present in sorted(games_seen.items()):
         missing = [t for t in EXPECTED_FILE_TYPES if t not in present]
         if missing:
             warnings.append(f"Game vs. {game} MISSING: {', '.join(missing)}")
 
-    data: dict[str, pd.DataFrame] = {}
+    frames: dict[str, pd.DataFrame] = {}
 
     for file_type, dfs in combined.items():
         if dfs:
-            data[file_type] = pd.concat(dfs, ignore_index=True)
+            frames[file_type] = pd.concat(dfs, ignore_index=True)
         else:
-            data[file_type] = pd.DataFrame()
+            frames[file_type] = pd.DataFrame()
+
+    return SessionData(frames), warnings
 
-    return data, warnings
+def replaceGames(data, fresh, games):
+    """
+    data with every row of the given games swapped for fresh's rows (fresh
+    holds only those games; a game missing from it is dropped).
+    """
+    frames: dict[str, pd.DataFrame] = {}
+
+    for file_type in EXPECTED_FILE_TYPES:
+        old = data.get(file_type, pd.DataFrame())
+        if "Game" in old.columns:
+            old = old[~old["Game"].isin(games)]
+        parts = [df for df in (old, fresh.get(file_type, pd.DataFrame())) if not df.empty]
+        frames[file_type] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    return SessionData(frames)
 
 def getGameList(data: dict):
     games: set[str] = set()
 
-    for df in data.values():
-        if "Game" in df.columns:
-            games.update(df["Game"].dropna().astype(str))
+    for lookups in data.index.values():
+        games.update(str(g) for g in lookups["Game"])
 
     return sorted(games)
 
 
 def getPlayerList(data: dict):
-    if "Player Stats" not in data: return []
-    df = data["Player Stats"]
-
-    if "Player" not in df.columns: return []
-    players = df["Player"].dropna().astype(str).unique()
+    lookups = data.index.get("Player Stats", {})
+    if "Player" not in lookups: return []
 
-    return sorted(players)
+    return sorted(str(p) for p in lookups["Player"])
 
 def getPlayerStats(data, game: str = "All", player: str = "Team"):
 
-    df = data.get("Player Stats", pd.DataFrame()).copy()
-    if df.empty: return df
-
-    if game != "All": df = df[df["Game"].astype(str) == game]
-    if player != "Team": df = df[df["Player"].astype(str) == player]
+    if player == "Team":
+        df = selectRows(data, "Player Stats", game)
+    else:
+        df = selectRows(data, "Player Stats", game, "Player", player)
 
     return df.reset_index(drop=True)
 
 def getFileData(data, file_type, game: str = "All", player: str = "Team"):
 
-    df = data.get(file_type, pd.DataFrame()).copy()
+    df = data.get(file_type, pd.DataFrame())
     if df.empty:
         return df
 
-    # filter by game
-    if game != "All": df = df[df["Game"].astype(str) == game]
-
-    # filter by player
-    if player != "Team":
-        if file_type == "Passes":
+    if player == "Team":
+        df = selectRows(data, file_type, game)
 
-            t = df["Thrower"].astype(str) if "Thrower" in df else ""
-            r = df["Receiver"].astype(str) if "Receiver" in df else ""
+    # passes match the player as either thrower or receiver
+    elif file_type == "Passes":
+        player = player.strip()
+        rows = np.union1d(
+            rowPositions(data, file_type, game, "Thrower", player),
+            rowPositions(data, file_type, game, "Receiver", player),
+        )
+        df = df.take(rows)
 
-            df = df[(t == player) | (r == player)]
+    elif file_type in PLAYER_COLS:
+        df = selectRows(data, file_type, game, PLAYER_COLS[file_type], player)
 
-        elif file_type in PLAYER_COLS:
-
-            col = PLAYER_COLS[file_type]
-            if col in df.columns:
-                df = df[df[col].astype(str) == player]
+    else:
+        df = selectRows(data, file_type, game)
 
     return df.reset_index(drop=True)
 
-def dataEndpoints(file_type, game, player):
+def dataEndpoints(session_id, file_type, game, player, fmt="csv"):
     return (
-        f"/api/data/{url_quote(file_type)}"
-        f"?game={url_quote(game)}&player={url_quote(player)}"
+        f"/api/data/{session_id}/{url_quote(file_type)}"
+        f"?game={url_quote(game)}&player={url_quote(player)}&format={fmt}"
     )
 
 
@@ -162,7 +396,7 @@ if __name__ == "__main__":
 
     paths = sys.argv[1:]
     if not paths:
-        print("Usage: python processor.py path/to/*.csv")
+        print("Usage: python processor.py path/to/*.csv [exports.zip ...]")
         sys.exit(1)
 
     file_list = []
@@ -173,7 +407,8 @@ if __name__ == "__main__":
             print(f"[skip] not found: {p}")
             continue
 
-        file_list.append((path.name, path.read_bytes()))
+        content = path.open("rb") if isArchive(path.name) else path.read_bytes()
+        file_list.append((path.name, content))
 
     data, warnings = processUploads(file_list)
 
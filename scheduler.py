@@ -0,0 +1,116 @@
+"""
+One render queue for the whole process.
+
+Every CPU-bound render goes through RenderScheduler instead of the default
+executor, so that:
+- interactive requests always go ahead of background preloads
+- sessions take turns (round robin), so one big upload can't starve others
+- at most `limit` renders run at once
+- preloads stop being dispatched while interactive work is waiting, and
+  always leave one slot free for the next click
+- a queued preload that a click turns out to be waiting on can be
+  promoted to interactive (see promote)
+"""
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+INTERACTIVE = "interactive"
+PRELOAD     = "preload"
+
+
+class RenderScheduler:
+
+    def __init__(self, limit: int):
+        self.limit   = max(1, limit)
+        self.pool    = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix="render")
+        self.queues  = {INTERACTIVE: OrderedDict(), PRELOAD: OrderedDict()}
+        self.running = {INTERACTIVE: 0, PRELOAD: 0}
+        self.done    = {INTERACTIVE: 0, PRELOAD: 0}
+
+    async def submit(self, session_id, fn, *args, priority=INTERACTIVE, key=None):
+        """
+        Queue fn(*args) behind this session's earlier work and await it.
+        key names the job for promote.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queues[priority].setdefault(session_id, deque()).append((fn, args, future, key))
+        self.pump()
+        return await future
+
+    def promote(self, session_id, key) -> bool:
+        """Move the queued preload named key to the back of the session's interactive queue."""
+        sessions = self.queues[PRELOAD]
+        jobs = sessions.get(session_id, ())
+        job = next((j for j in jobs if key is not None and j[3] == key), None)
+        if job is None:
+            return False   # already running, done, or never a preload
+
+        jobs.remove(job)
+        if not jobs:
+            del sessions[session_id]
+        self.queues[INTERACTIVE].setdefault(session_id, deque()).append(job)
+        self.pump()
+        return True
+
+    def queued(self, priority):
+        return sum(len(q) for q in self.queues[priority].values())
+
+    def underLoad(self):
+        busy = self.running[INTERACTIVE] + self.running[PRELOAD]
+        return self.queued(INTERACTIVE) > 0 or busy >= max(1, self.limit - 1)
+
+    def nextJob(self):
+        if self.queues[INTERACTIVE]:
+            priority = INTERACTIVE
+        elif self.queues[PRELOAD] and not self.underLoad():
+            priority = PRELOAD
+        else:
+            return None
+
+        # round robin: take the front session's oldest job, send it to the back
+        sessions = self.queues[priority]
+        session_id, jobs = next(iter(sessions.items()))
+        job = jobs.popleft()
+        if jobs:
+            sessions.move_to_end(session_id)
+        else:
+            del sessions[session_id]
+        return priority, job
+
+    def pump(self):
+        loop = asyncio.get_running_loop()
+        while self.running[INTERACTIVE] + self.running[PRELOAD] < self.limit:
+            nxt = self.nextJob()
+            if nxt is None:
+                return
+
+            priority, (fn, args, future, _) = nxt
+            if future.cancelled():
+                continue
+
+            self.running[priority] += 1
+            work = loop.run_in_executor(self.pool, fn, *args)
+            work.add_done_callback(
+                lambda w, p=priority, f=future: self.finished(w, p, f)
+            )
+
+    def finished(self, work, priority, future):
+        self.running[priority] -= 1
+        self.done[priority] += 1
+        if not future.cancelled():
+            if work.exception() is not None:
+                future.set_exception(work.exception())
+            else:
+                future.set_result(work.result())
+        self.pump()
+
+    def stats(self):
+        return {
+            "limit":    self.limit,
+            "running":  dict(self.running),
+            "queued":   {p: self.queued(p) for p in self.queues},
+            "sessions": {p: len(q) for p, q in self.queues.items()},
+            "done":     dict(self.done),
+            "preloads_paused": bool(self.queues[PRELOAD]) and self.underLoad(),
+        }
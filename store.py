@@ -0,0 +1,230 @@
+"""
+Cross-process store shared by every uvicorn worker on this machine.
+
+A single SQLite file (WAL mode) holds uploaded session frames, rendered
+chart fragments and ingest job status. Each worker keeps its
+own in-memory copies (SESSIONS / CHART_CACHE in main) as a first-level
+cache and falls back to this store on a miss, so a request can land on
+any worker.
+
+Fragments are keyed by the session data's digest and the chart code
+version rather than the session id, so they survive restarts and
+re-uploads of the same files, and are capped in size with LRU eviction.
+Each keeps the in-place update delta rendered with it (see chartDelta in
+main), if any.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+STORE_PATH = Path(os.environ.get(
+    "FLATBALL_STORE", Path(__file__).parent / ".cache" / "flatball.sqlite3"
+))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id       TEXT PRIMARY KEY,
+    frames   BLOB NOT NULL,
+    created  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rendered (
+    digest   TEXT NOT NULL,
+    game     TEXT NOT NULL,
+    player   TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    version  TEXT NOT NULL,
+    html     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    used     REAL NOT NULL,
+    PRIMARY KEY (digest, game, player, mode, version)
+);
+CREATE INDEX IF NOT EXISTS rendered_used ON rendered (used);
+-- running SUM(size) of rendered, so eviction needn't scan the table
+CREATE TABLE IF NOT EXISTS rendered_total (
+    bytes    INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS rendered_insert AFTER INSERT ON rendered
+    BEGIN UPDATE rendered_total SET bytes = bytes + new.size; END;
+CREATE TRIGGER IF NOT EXISTS rendered_delete AFTER DELETE ON rendered
+    BEGIN UPDATE rendered_total SET bytes = bytes - old.size; END;
+CREATE TRIGGER IF NOT EXISTS rendered_update AFTER UPDATE OF size ON rendered
+    BEGIN UPDATE rendered_total SET bytes = bytes + new.size - old.size; END;
+CREATE TABLE IF NOT EXISTS jobs (
+    id       TEXT PRIMARY KEY,
+    state    TEXT NOT NULL,
+    updated  REAL NOT NULL
+);
+"""
+
+# one-time changes to stores made by earlier versions, run in order;
+# PRAGMA user_version counts the ones already applied
+MIGRATIONS = [
+    "DROP TABLE IF EXISTS fragments",   # per-session-id fragments, replaced by rendered
+    "INSERT INTO rendered_total SELECT COALESCE(SUM(size), 0) FROM rendered",
+    "DROP TABLE IF EXISTS locks",       # preload locks, no longer used
+    "ALTER TABLE rendered ADD COLUMN delta TEXT",
+    "DELETE FROM rendered",             # rendered before deltas were kept
+]
+
+# total size of cached fragments; least recently used go first past this
+FRAGMENT_LIMIT = int(os.environ.get("FLATBALL_FRAGMENT_CACHE_MB", 512)) * 2**20
+TOUCH_EVERY = 60   # seconds between last-used updates for one fragment
+
+_local = threading.local()
+
+
+def db() -> sqlite3.Connection:
+    """One connection per thread; the schema is created on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(STORE_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        migrate(conn)
+        _local.conn = conn
+    return conn
+
+
+
+def migrate(conn):
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+    # one worker migrates; any other waits here, then finds nothing left
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        done = conn.execute("PRAGMA user_version").fetchone()[0]
+        for script in MIGRATIONS[done:]:
+            conn.execute(script)
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# ── sessions ─────────────────────────────────────────────────────────────────
+
+def putSession(session_id, frames: dict):
+    blob = pickle.dumps(dict(frames), protocol=pickle.HIGHEST_PROTOCOL)
+    db().execute(
+        "INSERT OR REPLACE INTO sessions (id, frames, created) VALUES (?, ?, ?)",
+        (session_id, blob, time.time()),
+    )
+
+
+def getSession(session_id) -> dict | None:
+    row = db().execute("SELECT frames FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    return pickle.loads(row[0]) if row else None
+
+
+def listSessions() -> dict:
+    """session id -> upload time and pickled size."""
+    rows = db().execute("SELECT id, created, LENGTH(frames) FROM sessions")
+    return {sid: {"created": created, "stored_bytes": size} for sid, created, size in rows}
+
+
+def pruneSessions(ttl, keep=()):
+    """Drop sessions uploaded more than ttl seconds ago, except those in keep."""
+    marks = ",".join("?" * len(keep))
+    cur = db().execute(
+        f"DELETE FROM sessions WHERE created < ? AND id NOT IN ({marks})",
+        (time.time() - ttl, *keep),
+    )
+    return cur.rowcount
+
+
+def dropSession(session_id):
+    # fragments may be shared with other sessions holding the same data;
+    # they age out through evictFragments
+    db().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+# ── rendered fragments ───────────────────────────────────────────────────────
+# key = (digest, game, player, mode, version)
+
+FRAGMENT_WHERE = "digest = ? AND game = ? AND player = ? AND mode = ? AND version = ?"
+
+
+def putFragment(key, html, delta=None):
+    size = len(html.encode()) + len((delta or "").encode())
+    # an upsert, not INSERT OR REPLACE, whose implicit delete would skip
+    # the rendered_delete trigger
+    db().execute(
+        "INSERT INTO rendered (digest, game, player, mode, version, html, delta, size, used)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (digest, game, player, mode, version) DO UPDATE"
+        " SET html = excluded.html, delta = excluded.delta, size = excluded.size,"
+        " used = excluded.used",
+        (*key, html, delta, size, time.time()),
+    )
+    evictFragments()
+
+
+def getFragment(key) -> tuple[str, str | None] | None:
+    """(html, delta) for key, or None."""
+    conn = db()
+    row = conn.execute(
+        f"SELECT html, delta, used FROM rendered WHERE {FRAGMENT_WHERE}", key
+    ).fetchone()
+    if row is None:
+        return None
+    now = time.time()
+    if now - row[2] > TOUCH_EVERY:
+        conn.execute(f"UPDATE rendered SET used = ? WHERE {FRAGMENT_WHERE}", (now, *key))
+    return row[0], row[1]
+
+
+def evictFragments(limit=None):
+    """Drop least recently used fragments until the total fits in limit bytes."""
+    limit = FRAGMENT_LIMIT if limit is None else limit
+    conn = db()
+    excess = conn.execute("SELECT bytes FROM rendered_total").fetchone()[0] - limit
+    if excess <= 0:
+        return 0
+
+    doomed = []
+    for rowid, size in conn.execute("SELECT rowid, size FROM rendered ORDER BY used"):
+        doomed.append((rowid,))
+        excess -= size
+        if excess <= 0:
+            break
+    conn.executemany("DELETE FROM rendered WHERE rowid = ?", doomed)
+    return len(doomed)
+
+
+def fragmentTotals() -> dict:
+    conn = db()
+    count = conn.execute("SELECT COUNT(*) FROM rendered").fetchone()[0]
+    size = conn.execute("SELECT bytes FROM rendered_total").fetchone()[0]
+    return {"count": count, "bytes": size, "limit": FRAGMENT_LIMIT}
+
+
+def pruneFragments(version):
+    """Drop fragments rendered by other chart code versions."""
+    cur = db().execute("DELETE FROM rendered WHERE version != ?", (version,))
+    return cur.rowcount
+
+
+# ── ingest jobs ──────────────────────────────────────────────────────────────
+
+def putJob(job_id, job: dict):
+    db().execute(
+        "INSERT OR REPLACE INTO jobs (id, state, updated) VALUES (?, ?, ?)",
+        (job_id, json.dumps(job), time.time()),
+    )
+
+
+def getJob(job_id) -> dict | None:
+    row = db().execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def pruneJobs(ttl):
+    db().execute("DELETE FROM jobs WHERE updated < ?", (time.time() - ttl,))
+
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLES = ROOT / "samplefiles"
+
+# a throwaway store, set before store.py reads it at import
+os.environ["FLATBALL_STORE"] = str(Path(tempfile.mkdtemp(prefix="flatball-test-")) / "store.sqlite3")
+sys.path.insert(0, str(ROOT))
+
+
+def sampleFiles():
+    return [(p.name, p.read_bytes()) for p in sorted(SAMPLES.glob("*.csv"))]
+
+
+@pytest.fixture(scope="session")
+def sample():
+    import processor
+
+    data, _ = processor.processUploads(sampleFiles())
+    return data
+
+
+@pytest.fixture
+def client(sample, monkeypatch):
+    """TestClient on the app with the sample games loaded as session "sample"."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.chdir(ROOT)   # templates load relative to the working directory
+    main.prepare(sample)
+    monkeypatch.setitem(main.SESSIONS, "sample", sample)
+    return TestClient(main.app)
@@ -0,0 +1,157 @@
+def test_possessions_with_passes(client, sample):
+    resp = client.get("/api/possessions/sample", params={"passes": "true"})
+    assert resp.status_code == 200
+
+    body = resp.json()
+    assert body["possessions"]
+    chains = [rec["chain"] for rec in body["possessions"]]
+    assert sum(len(c) for c in chains) == len(sample["Passes"])
+    assert all(set(p) == {"Thrower", "Receiver", "Turnover?", "Forward distance (m)"}
+               for c in chains for p in c)
+
+
+def test_possessions_expired(client):
+    assert client.get("/api/possessions/nope").status_code == 404
+
+
+def test_admin_needs_token(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.get("/api/admin").status_code == 404
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "sekrit")
+    assert client.get("/api/admin").status_code == 403
+    assert client.delete("/api/admin/sessions/sample", headers={"X-Admin-Token": "nope"}).status_code == 403
+
+    resp = client.get("/api/admin", headers={"X-Admin-Token": "sekrit"})
+    assert resp.status_code == 200
+    assert {s["session"] for s in resp.json()["sessions"]} >= {"sample"}
+
+
+def test_upload_warnings_are_escaped(client):
+    import time
+
+    with client:   # one event loop for the whole test, so the ingest task runs
+        resp = client.post("/upload", files=[("files", ("<img src=x onerror=alert(1)>.csv", b"a,b\n"))])
+        job = resp.text.split('hx-get="/upload/')[1].split('"')[0]
+        while client.get(f"/api/upload/{job}").json()["status"] not in ("ready", "failed"):
+            time.sleep(0.05)
+        page = client.get(f"/upload/{job}").text
+
+    assert "<img" not in page and "&lt;img" in page
+
+
+def test_concurrent_session_loads_share_one(monkeypatch):
+    import asyncio
+
+    import main
+
+    calls = []
+
+    def loadSession(session_id):
+        calls.append(session_id)
+        return {"loaded": session_id}
+
+    async def load():
+        return await asyncio.gather(*(main.getSession("stored") for _ in range(5)))
+
+    monkeypatch.setattr(main, "loadSession", loadSession)
+    monkeypatch.delitem(main.SESSIONS, "stored", raising=False)
+    loaded = asyncio.run(load())
+    main.SESSIONS.pop("stored", None)
+
+    assert calls == ["stored"]
+    assert all(data is loaded[0] for data in loaded)
+    assert not main.LOADING
+
+
+def test_delta_comes_back_from_the_fragment_store(client, monkeypatch):
+    import main
+
+    key = ("sample", "Chop", "Touchmaps", "auto")
+    client.get("/charts/sample", params={"game": "Chop"})
+    _, templates = main.DELTA_CACHE[key]
+
+    def switch():
+        resp = client.get("/charts/sample", params={"game": "Chop"},
+                          headers={"X-Chart-Mounted": ",".join(t or "" for t in templates)})
+        assert resp.headers["content-type"].startswith("application/json")
+        return resp.headers["X-Chart-Cache"]
+
+    monkeypatch.setattr(main, "CHART_CACHE", {})     # another worker
+    monkeypatch.setattr(main, "DELTA_CACHE", {})
+    assert switch() == "store"
+
+    main.DELTA_CACHE.clear()                          # evicted, HTML still cached
+    assert switch() == "store"
+    assert switch() == "memory"
+
+
+def test_delta_cache_evicts_least_recently_used(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "DELTA_CACHE", {})
+    monkeypatch.setattr(main, "DELTA_LIMIT", 2)
+    main.cacheDelta("a", None)
+    main.cacheDelta("b", None)
+    main.cacheDelta("a", None)   # used again
+    main.cacheDelta("c", None)
+    assert list(main.DELTA_CACHE) == ["a", "c"]
+
+
+def test_export_selects_rows_off_the_event_loop(client, sample, monkeypatch):
+    import asyncio
+
+    import processor
+
+    on_loop = []
+    getFileData = processor.getFileData
+
+    def spy(*args):
+        try:
+            on_loop.append(asyncio.get_running_loop() is not None)
+        except RuntimeError:
+            on_loop.append(False)
+        return getFileData(*args)
+
+    monkeypatch.setattr(processor, "getFileData", spy)
+    resp = client.get("/api/data/sample/Passes", params={"game": "Chop"})
+
+    assert resp.status_code == 200
+    assert len(resp.text.splitlines()) == 1 + (sample["Passes"]["Game"] == "Chop").sum()
+    assert on_loop == [False]
+
+
+def test_players_are_keyed_apart_from_views(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "CHART_CACHE", {})
+    view = client.get("/charts/sample", params={"view": "Defense"}).text
+    player = client.get("/charts/sample", params={"player": "Defense"}).text
+
+    assert set(main.CHART_CACHE) == {("sample", "All", "Defense", "auto"),
+                                     ("sample", "All", "player:Defense", "auto")}
+    assert view != player
+    assert "view=Defense" in view and "player=Defense" not in view
+
+
+def test_preload_renders_default_views_and_players(sample, monkeypatch):
+    import asyncio
+
+    import main
+    import processor
+
+    rendered = []
+
+    async def renderCached(key, *args, **kwargs):
+        rendered.append(key[1:3])
+
+    monkeypatch.setattr(main, "renderCached", renderCached)
+    monkeypatch.setattr(main, "PRELOADS", {})
+    monkeypatch.setitem(main.SESSIONS, "sample", sample)
+    asyncio.run(main.preloadSession("sample"))
+
+    targets = [*main.PRELOAD_VIEWS, *(f"player:{p}" for p in processor.getPlayerList(sample))]
+    games = ["All", *processor.getGameList(sample)]
+    assert rendered == [(g, t) for g in games for t in targets]
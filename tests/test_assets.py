@@ -0,0 +1,39 @@
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def assets(monkeypatch):
+    """assets with its URL and asset tables emptied, so they load again."""
+    import assets
+
+    monkeypatch.setattr(assets, "URLS", {})
+    monkeypatch.setattr(assets, "ASSETS", {})
+    return assets
+
+
+def test_missing_asset_is_logged(assets, monkeypatch, tmp_path, caplog):
+    from plotly.offline import get_plotlyjs_version
+
+    monkeypatch.setitem(assets.SOURCES, "plotly.min.js",
+                        (lambda: tmp_path / "plotly.min.js", assets.plotlyUrl, None))
+    with caplog.at_level(logging.ERROR, logger="assets"):
+        url = assets.assetUrl("plotly.min.js")
+
+    assert url.endswith(f"/plotly-{get_plotlyjs_version()}.min.js")
+    assert "plotly.min.js is missing" in caplog.text
+
+
+def test_local_asset_gets_hashed_url(assets, monkeypatch, tmp_path, caplog):
+    path = tmp_path / "htmx.min.js"
+    path.write_text(f'var htmx={{version:"{assets.HTMX_VERSION}"}}')
+    monkeypatch.setitem(assets.SOURCES, "htmx.min.js",
+                        (lambda: path, lambda: assets.HTMX_URL, assets.HTMX_VERSION))
+    monkeypatch.setattr(assets, "BUILD_DIR", tmp_path / "build")
+    with caplog.at_level(logging.ERROR, logger="assets"):
+        url = assets.assetUrl("htmx.min.js")
+
+    hashed = url.rsplit("/", 1)[1]
+    assert hashed.startswith("htmx-") and not caplog.text
+    assert assets.getAsset(hashed).body == path.read_bytes()
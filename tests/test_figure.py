@@ -0,0 +1,36 @@
+import json
+
+from plotly.io.json import to_json_plotly
+
+import pytest
+
+from charts.figure import LayoutTemplate, checkFigure, figureJson, templated
+from charts.init import RENDER_MODES, TEAM_VIEWS, getCharts, playerTarget
+
+
+def test_template_fills_slots_like_plotly():
+    template = LayoutTemplate({"title": {"text": ""}, "height": 300}, {"title": ("title", "text")})
+    text = "Chop </script><b>é</b>"
+    assert template.json({"title": text}) == to_json_plotly(template.filled({"title": text}))
+
+
+def test_template_slots_cannot_close_script():
+    template = LayoutTemplate({"title": {"text": ""}}, {"title": ("title", "text")})
+    fig = figureJson(templated(template, title="</script><script>alert(1)"))
+
+    for part in (fig.layout, fig.slots):
+        assert "</script>" not in part
+    assert json.loads(fig.layout)["title"]["text"] == "</script><script>alert(1)"
+
+
+@pytest.mark.parametrize("mode", RENDER_MODES)
+@pytest.mark.parametrize("target", [*TEAM_VIEWS, "player"])
+def test_views_pass_validation(sample, target, mode):
+    """Every view's dict figures, as FLATBALL_VALIDATE=1 checks them."""
+    import processor
+
+    if target == "player":
+        target = playerTarget(processor.getPlayerList(sample)[0])
+    _, figs = getCharts(sample, "All", target, mode)
+    for fig in figs:
+        checkFigure(fig)
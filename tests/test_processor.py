@@ -0,0 +1,117 @@
+import gzip
+import io
+import tarfile
+import zipfile
+
+import pandas as pd
+
+import processor
+from conftest import sampleFiles
+
+
+def chopFiles():
+    return [(name, content) for name, content in sampleFiles() if " vs. Chop " in name]
+
+
+def test_replace_games(sample):
+    fresh, _ = processor.processUploads(chopFiles())
+    fresh["Passes"] = fresh["Passes"].head(5)
+
+    data = processor.replaceGames(sample, fresh, ["Chop", "Sweets"])
+
+    assert processor.getGameList(data) == [g for g in processor.getGameList(sample) if g != "Sweets"]
+    passes = data["Passes"]
+    assert (passes["Game"] == "Chop").sum() == 5
+    for game in ("Braineaters", "Wasabi"):
+        old = sample["Passes"][sample["Passes"]["Game"] == game].reset_index(drop=True)
+        new = passes[passes["Game"] == game].reset_index(drop=True)
+        pd.testing.assert_frame_equal(old, new)
+    # indexes are rebuilt for the new frames
+    assert len(processor.selectRows(data, "Passes", "Chop")) == 5
+
+
+def members(name, archive):
+    warnings = []
+    found = [(n, c if isinstance(c, bytes) else c.read())
+             for n, c in processor.archiveMembers(name, archive, warnings)]
+    return found, warnings
+
+
+def test_zip_members():
+    files = chopFiles()
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("exports/", "")
+        for name, content in files:
+            zf.writestr(f"exports/{name}", content)
+        zf.writestr("__MACOSX/exports/._x.csv", b"junk")
+        zf.writestr("exports/.DS_Store", b"junk")
+
+    found, warnings = members("exports.zip", buf.getvalue())
+    assert warnings == []
+    assert found == [(f"exports/{name}", content) for name, content in files]
+
+
+def test_tar_members():
+    files = chopFiles()
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, content in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    buf.seek(0)
+
+    found, warnings = members("exports.tar.gz", buf)
+    assert warnings == []
+    assert found == files
+
+
+def test_bad_archive_warns():
+    for name in ("exports.zip", "exports.tgz"):
+        found, warnings = members(name, b"not an archive")
+        assert found == []
+        assert len(warnings) == 1 and name in warnings[0]
+
+
+def test_compressed_csv():
+    name, content = chopFiles()[0]
+    found, warnings = members(f"{name}.gz", gzip.compress(content))
+    assert warnings == []
+    assert found == [(name, content)]
+
+
+def test_archive_limits(monkeypatch):
+    monkeypatch.setattr(processor, "ARCHIVE_MAX_MEMBER_BYTES", 100)
+    monkeypatch.setattr(processor, "ARCHIVE_MAX_TOTAL_BYTES", 250)
+    monkeypatch.setattr(processor, "ARCHIVE_MAX_MEMBERS", 4)
+
+    def archive(sizes):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, size in enumerate(sizes):
+                zf.writestr(f"{i}.csv", b"0" * size)
+        return buf.getvalue()
+
+    found, warnings = members("x.zip", archive([90, 1000, 90]))
+    assert [n for n, _ in found] == ["0.csv", "2.csv"]
+    assert len(warnings) == 1 and "'1.csv'" in warnings[0]
+
+    found, warnings = members("x.zip", archive([90, 90, 90]))
+    assert len(found) == 2 and "Stopped reading" in warnings[0]
+
+    found, warnings = members("x.zip", archive([1] * 5))
+    assert len(found) == 4 and "more than 4 files" in warnings[0]
+
+    found, warnings = members("x.csv.gz", gzip.compress(b"0" * 1000))
+    assert found == [] and "'x.csv'" in warnings[0]
+
+
+def test_archive_in_upload_batch():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, content in chopFiles():
+            zf.writestr(name, content)
+
+    data, _ = processor.processUploads([("exports.zip", buf.getvalue())])
+    assert processor.getGameList(data) == ["Chop"]
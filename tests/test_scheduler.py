@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+from scheduler import PRELOAD, RenderScheduler
+
+
+def runQueued(jobs, limit=1, promote=()):
+    """
+    Order jobs ran in, queued as (session, name, priority) while a first
+    job holds every render slot.
+    """
+    async def scenario():
+        sched = RenderScheduler(limit)
+        gate, order = threading.Event(), []
+        blockers = [asyncio.ensure_future(sched.submit("x", gate.wait)) for _ in range(limit)]
+        await asyncio.sleep(0)
+
+        queued = [
+            asyncio.ensure_future(sched.submit(s, order.append, name, priority=p, key=name))
+            for s, name, p in jobs
+        ]
+        await asyncio.sleep(0)
+        promoted = [sched.promote(s, name) for s, name in promote]
+        gate.set()
+        await asyncio.gather(*blockers, *queued)
+        return order, promoted
+
+    return asyncio.run(scenario())
+
+
+def test_interactive_before_preload():
+    order, _ = runQueued([
+        ("a", "p1", PRELOAD), ("a", "i1", "interactive"), ("b", "p2", PRELOAD), ("b", "i2", "interactive"),
+    ])
+    assert order == ["i1", "i2", "p1", "p2"]
+
+
+def test_sessions_take_turns():
+    order, _ = runQueued([
+        ("a", "a1", "interactive"), ("a", "a2", "interactive"), ("a", "a3", "interactive"),
+        ("b", "b1", "interactive"), ("b", "b2", "interactive"),
+    ])
+    assert order == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_promote_moves_preload_ahead():
+    order, promoted = runQueued(
+        [("a", "p1", PRELOAD), ("a", "p2", PRELOAD), ("a", "p3", PRELOAD)],
+        promote=[("a", "p3"), ("a", "missing")],
+    )
+    assert promoted == [True, False]
+    assert order == ["p3", "p1", "p2"]
+
+
+def test_errors_reach_the_caller():
+    async def scenario():
+        sched = RenderScheduler(2)
+        try:
+            await sched.submit("a", int, "not a number")
+        except ValueError:
+            return sched.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["running"] == {"interactive": 0, "preload": 0}
+    assert stats["done"]["interactive"] == 1
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+import store
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_PATH", tmp_path / "store.sqlite3")
+    monkeypatch.setattr(store, "_local", threading.local())
+
+
+def test_sessions_round_trip_and_expire():
+    store.putSession("a", {"Passes": [1, 2]})
+    assert store.getSession("a") == {"Passes": [1, 2]}
+    assert store.getSession("b") is None
+
+    store.putSession("b", {})
+    assert store.pruneSessions(-1, keep=["b"]) == 1
+    assert set(store.listSessions()) == {"b"}
+
+
+def test_jobs_round_trip_and_expire():
+    store.putJob("j", {"status": "parsing", "parsed": 3})
+    assert store.getJob("j") == {"status": "parsing", "parsed": 3}
+
+    store.db().execute("UPDATE jobs SET updated = ?", (time.time() - 120,))
+    store.pruneJobs(60)
+    assert store.getJob("j") is None
+
+
+def key(game, version="v1"):
+    return ("digest", game, "Touchmaps", "auto", version)
+
+
+def total():
+    return store.db().execute("SELECT bytes FROM rendered_total").fetchone()[0]
+
+
+def test_fragments_keep_running_total():
+    store.putFragment(key("Chop"), "x" * 100)
+    store.putFragment(key("Chop"), "x" * 40)       # replaced, not added
+    store.putFragment(key("Sweets"), "y" * 60)
+    assert store.getFragment(key("Chop")) == ("x" * 40, None)
+    assert store.getFragment(key("Chop", "v2")) is None
+    assert total() == 100 == store.fragmentTotals()["bytes"]
+
+    store.putFragment(key("Wasabi"), "z" * 10, delta="d" * 5)
+    assert store.getFragment(key("Wasabi")) == ("z" * 10, "d" * 5)
+    assert total() == 115
+
+    assert store.pruneFragments("v2") == 3
+    assert total() == 0
+
+
+def test_evicts_least_recently_used():
+    for i, game in enumerate(["a", "b", "c", "d"]):
+        store.putFragment(key(game), "x" * 100)
+        store.db().execute("UPDATE rendered SET used = ? WHERE game = ?", (i, game))
+
+    store.db().execute("UPDATE rendered SET used = 10 WHERE game = 'a'")   # read since
+    assert store.evictFragments(limit=250) == 2
+    assert [g for g in "abcd" if store.getFragment(key(g))] == ["a", "d"]
+    assert total() == 200
+
+
+def test_migrations_run_once():
+    conn = store.db()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(store.MIGRATIONS)
+    store.migrate(conn)
+    assert conn.execute("SELECT COUNT(*) FROM rendered_total").fetchone()[0] == 1
+
+
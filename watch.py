@@ -0,0 +1,143 @@
+"""
+Watch mode: keep one named session in step with a folder of Statto exports.
+
+At tournaments the exports land in a synced folder. The server watches it
+(inotify on Linux, polling elsewhere) and hands over batches of changed
+file names once the folder goes quiet; main re-parses only the games those
+files belong to. inotify is called through libc so no watcher package is
+needed.
+"""
+import ctypes
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+from processor import parseFname
+
+POLL_EVERY = float(os.environ.get("FLATBALL_WATCH_POLL", 2.0))
+# a game's six exports arrive one by one; wait this long after the last
+# event so they are ingested together
+SETTLE = float(os.environ.get("FLATBALL_WATCH_SETTLE", 1.0))
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM  = 0x040
+IN_MOVED_TO    = 0x080
+IN_DELETE      = 0x200
+IN_Q_OVERFLOW  = 0x4000
+IN_CLOEXEC     = 0o2000000
+EVENT = struct.Struct("iIII")   # wd, mask, cookie, name length
+
+
+def exportFiles(folder: Path):
+    """Visible files in folder -> (mtime, size)."""
+    files = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.startswith("."):
+                st = entry.stat()
+                files[entry.name] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+class Inotify:
+    """File events in one folder from Linux inotify."""
+    mode = "inotify"
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+    def __init__(self, folder: Path):
+        libc = ctypes.CDLL(None, use_errno=True)   # AttributeError off Linux
+        self.folder = folder
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"cannot watch {folder}")
+
+    def changes(self, timeout):
+        """Names with an event in the next timeout seconds (empty if none)."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        buf = os.read(self.fd, 1 << 16)
+        names, pos = set(), 0
+        while pos < len(buf):
+            _, mask, _, size = EVENT.unpack_from(buf, pos)
+            name = buf[pos + EVENT.size:pos + EVENT.size + size].rstrip(b"\0")
+            pos += EVENT.size + size
+            if mask & IN_Q_OVERFLOW:
+                names.update(exportFiles(self.folder))   # events lost: treat everything as changed
+            elif name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Poller:
+    """Same interface as Inotify, comparing mtimes and sizes between scans."""
+    mode = "poll"
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.seen = exportFiles(folder)
+
+    def changes(self, timeout):
+        time.sleep(timeout)
+        now = exportFiles(self.folder)
+        changed = {n for n in now.keys() | self.seen.keys() if now.get(n) != self.seen.get(n)}
+        self.seen = now
+        return changed
+
+    def close(self):
+        pass
+
+
+def changeSource(folder: Path):
+    try:
+        return Inotify(folder)
+    except (OSError, AttributeError):
+        return Poller(folder)
+
+
+def batches(source, stop=None):
+    """Sets of changed file names, each yielded once SETTLE seconds pass with no new events."""
+    pending = set()
+    while stop is None or not stop.is_set():
+        names = source.changes(SETTLE if pending else POLL_EVERY)
+        if names:
+            pending |= names
+        elif pending:
+            yield pending
+            pending = set()
+
+
+def changedGames(names) -> set[str]:
+    """Opponents of the Statto exports among names; other files are ignored."""
+    return {parsed[1] for parsed in map(parseFname, names) if parsed}
+
+
+def gameFiles(folder: Path, games=None):
+    """
+    (name, bytes) of the exports in folder for games (default every game).
+    A game exported more than once keeps only its newest file of each type.
+    """
+    newest = {}
+    for name in exportFiles(folder):
+        parsed = parseFname(name)
+        if not parsed or (games is not None and parsed[1] not in games):
+            continue
+        file_type, opponent, stamp = parsed
+        key = (file_type, opponent)
+        if key not in newest or stamp > newest[key][0]:
+            newest[key] = (stamp, name)
+
+    file_list = []
+    for _, name in sorted(newest.values(), key=lambda v: v[1]):
+        try:
+            file_list.append((name, (folder / name).read_bytes()))
+        except OSError:
+            pass   # removed since the scan; its delete event follows
+    return file_list